@@ -7,15 +7,16 @@ from hypercorn.asyncio import serve
 from hypercorn.config import Config
 from quart import Quart, current_app
 from quart_cors import cors
-from socketio import AsyncServer, ASGIApp
+from socketio import AsyncServer, ASGIApp, AsyncRedisManager
 from dotenv import load_dotenv
 
 from app.utils.status import set_sio_instance
-from .config import configure_app
+from .config import REDIS_URL, STATE_BACKEND, configure_app
 from .routes import register_routes
 from .database import initialize_database
 from .auth.oauth import configure_oauth
 from .utils.socket_handlers import register_socket_handlers
+from .services.build_manager import build_manager
 
 # Load environment variables
 load_dotenv()
@@ -37,12 +38,13 @@ configure_app(app)
 # Initialize OAuth before routes
 configure_oauth(app)
 
-# Initialize Socket.IO
+# Initialize Socket.IO; with the Redis backend, emits reach the clients of every worker
 sio = AsyncServer(
     async_mode='asgi',
     cors_allowed_origins='*',
     path='/socket.io',
     logger=True,
+    client_manager=AsyncRedisManager(REDIS_URL) if STATE_BACKEND == 'redis' else None,
 )
 sio_app = ASGIApp(sio, app)
 
@@ -62,3 +64,4 @@ register_socket_handlers(sio)
 async def startup():
     current_app.sio = sio
     await initialize_database()
+    await build_manager.load_recent_builds()
@@ -2,6 +2,14 @@ import os
 from datetime import timedelta
 from itsdangerous import URLSafeTimedSerializer
 
+# Where state shared between workers lives: 'memory' for a single worker,
+# 'redis' to run several hypercorn workers or nodes against REDIS_URL.
+# Only Socket.IO and the session registry are shared: builds are still
+# scheduled, locked and cancelled per process, so with several workers
+# the build routes must be served by just one of them.
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'memory')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
 def configure_app(app):
     app.secret_key = os.getenv("SECRET_KEY", os.urandom(24).hex())
     app.permanent_session_lifetime = timedelta(minutes=30)
@@ -1,8 +1,9 @@
 from .user import async_session, engine, Base, User, UserSettings
+from .build import BuildRecord
 import asyncio
 from ..utils.session_manager import cleanup_stale_sessions
 
-__all__ = ['async_session', 'engine', 'Base', 'User', 'UserSettings']
+__all__ = ['async_session', 'engine', 'Base', 'User', 'UserSettings', 'BuildRecord']
 
 async def initialize_database():
     """Initialize the database schema"""
@@ -0,0 +1,88 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
+
+from .user import Base
+
+
+class BuildRecord(Base):
+    """SQLAlchemy model persisting one Docusaurus build run.
+
+    Attributes:
+        id (int): Primary key, auto-incremented; breaks ties between builds
+            that started in the same second.
+        build_id (str): Timestamp-based build identifier shown in the dashboard.
+        status (str): Final BuildStatus value (success, error, skipped, ...).
+        start_time (datetime): When the build started.
+        end_time (datetime): When the build finished.
+        duration_seconds (float): Wall-clock duration of the build.
+        trigger_source (str): Comma-separated trigger sources the build served.
+        message (str): Human readable outcome.
+        log_file (str): Path of the build log file, if any.
+        details (str): JSON-encoded remainder of the build record.
+    """
+    __tablename__ = 'build_records'
+    __table_args__ = (
+        Index('ix_build_records_start_time_id', 'start_time', 'id'),
+        Index('ix_build_records_status_start_time', 'status', 'start_time'),
+    )
+
+    id = Column(Integer, primary_key=True, doc="Primary key, auto-incremented record ID")
+    build_id = Column(String, nullable=False, index=True, doc="Timestamp-based build identifier")
+    status = Column(String, nullable=False, doc="Final build status")
+    start_time = Column(DateTime, nullable=False, doc="Build start time")
+    end_time = Column(DateTime, doc="Build end time")
+    duration_seconds = Column(Float, doc="Build duration in seconds")
+    trigger_source = Column(Text, doc="Comma-separated trigger sources")
+    message = Column(Text, doc="Outcome message")
+    log_file = Column(String, doc="Path of the build log file")
+    details = Column(Text, nullable=False, default='{}', doc="JSON-encoded remaining build fields")
+
+    # Keys of a build record that live in their own column
+    COLUMN_FIELDS = ('status', 'trigger_source', 'message', 'log_file')
+
+    @classmethod
+    def from_build_info(cls, build_info):
+        """Create a record from the build dict produced by BuildManager"""
+        start = build_info['start_time']
+        end = build_info.get('end_time')
+        start_time = start if not isinstance(start, str) else _parse_time(start)
+        end_time = end if not isinstance(end, str) else _parse_time(end)
+        details = {
+            key: value for key, value in build_info.items()
+            if key not in cls.COLUMN_FIELDS + ('id', 'start_time', 'end_time')
+        }
+        return cls(
+            build_id=build_info['id'],
+            status=build_info['status'],
+            start_time=start_time,
+            end_time=end_time,
+            duration_seconds=(end_time - start_time).total_seconds() if end_time else None,
+            trigger_source=build_info.get('trigger_source'),
+            message=build_info.get('message'),
+            log_file=build_info.get('log_file'),
+            details=json.dumps(details, default=str),
+        )
+
+    def to_dict(self):
+        """Build dict in the same shape BuildManager keeps in memory"""
+        record = json.loads(self.details or '{}')
+        record.update({
+            'id': self.build_id,
+            'status': self.status,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'duration_seconds': self.duration_seconds,
+            'trigger_source': self.trigger_source,
+            'message': self.message,
+            'log_file': self.log_file,
+        })
+        return record
+
+    def __repr__(self):
+        return f"<BuildRecord(build_id='{self.build_id}', status='{self.status}')>"
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
@@ -1,9 +1,8 @@
-import asyncio
 import os
 from quart import Quart, Blueprint, render_template, request, redirect, url_for, session, flash
 from sqlalchemy import select
 from .. database import async_session, User
-from .. utils.common import hash_password, verify_password
+from .. utils.common import PasswordHasherBusy, hash_password_async, verify_password_async
 from .. auth.oauth import oauth
 from .. config import configure_app
 from ..utils.shared_state import user_locks
@@ -29,7 +28,12 @@ async def register():
             if existing.scalar():
                 return await render_template('register.html', error="Email already exists")
 
-            user = User(email=email, password_hash=hash_password(password), is_social_account=False)
+            try:
+                password_hash = await hash_password_async(password)
+            except PasswordHasherBusy:
+                return await render_template('register.html', error="Too many requests, please try again shortly"), 429
+
+            user = User(email=email, password_hash=password_hash, is_social_account=False)
             db.add(user)
             await db.commit()
         return redirect(url_for('auth.login'))
@@ -49,13 +53,13 @@ async def login():
             
             # Check if user exists and has a password hash (not a social account)
             if user and user.password_hash:
-                if verify_password(password, user.password_hash):
-                    user_id = user.id
-                    # Create a new lock if it doesn't exist or if it's bound to a different loop
-                    if user_id not in user_locks or user_locks[user_id]._loop is not asyncio.get_running_loop():
-                        user_locks[user_id] = asyncio.Lock()
-                    
-                    async with user_locks[user_id]:
+                try:
+                    verified = await verify_password_async(password, user.password_hash)
+                except PasswordHasherBusy:
+                    return await render_template('login.html', error="Too many login attempts, please try again shortly"), 429
+
+                if verified:
+                    async with user_locks.hold(user.id):
                         session['user_id'] = user.id
                         session['email'] = user.email
                         
@@ -1,10 +1,15 @@
 from datetime import datetime
 import os
 from quart import Blueprint, redirect, render_template, request, session, url_for
-import yaml
 from pathlib import Path
-from ..utils.status import get_user_status
+from ..utils.status import get_user_status, status_publisher
+from ..utils.session_manager import session_registry
+from ..utils.shared_state import user_locks
 from .. services.build_manager import build_manager
+from .. services import build_history as build_history_store
+from .. services.post_index import Post, PostIndex, generate_blog_content, read_post_body
+from .. services.catalog_watcher import CatalogWatcher
+from .. services import file_io, post_store
 import asyncio
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -13,122 +18,45 @@ dashboard_bp = Blueprint('dashboard', __name__)
 BLOG_DIR = Path('/mnt/NewVolume/git/Doc/Docs-QT-PyQt-PySide-Custom-Widgets/blog')
 DRAFT_DIR = Path('/mnt/NewVolume/git/Doc/Docs-QT-PyQt-PySide-Custom-Widgets/blogs_draft')
 
+# Process-wide post index, shared by every request
+post_index = PostIndex(BLOG_DIR, DRAFT_DIR)
+catalog_watcher = CatalogWatcher(post_index)
+
 
 # -----------------------------
 # Blog operations
 # -----------------------------
-def parse_front_matter(content):
-    """Parse YAML front matter from markdown content"""
-    lines = content.split('\n')
-    if lines and lines[0] == '---':
-        front_matter_lines = []
-        for line in lines[1:]:
-            if line == '---':
-                break
-            front_matter_lines.append(line)
-        try:
-            front_matter = yaml.safe_load('\n'.join(front_matter_lines)) or {}
-        except yaml.YAMLError:
-            front_matter = {}
-        body = '\n'.join(lines[len(front_matter_lines) + 2:])
-        return front_matter, body
-    return {}, content
-
-def generate_blog_content(front_matter, body):
-    """Generate markdown content with YAML front matter"""
-    yaml_content = yaml.dump(front_matter, default_flow_style=False, allow_unicode=True)
-    return f"---\n{yaml_content}---\n\n{body}"
-
 async def get_blog_posts():
     """Get all blog posts from both published and draft directories"""
-    posts = []
-    
-    # Ensure directories exist
-    for directory in [BLOG_DIR, DRAFT_DIR]:
-        if not directory.exists():
-            directory.mkdir(parents=True, exist_ok=True)
-    
-    # Get published posts
-    for file_path in BLOG_DIR.glob('*.md'):
-        try:
-            content = file_path.read_text(encoding='utf-8')
-            front_matter, body = parse_front_matter(content)
-            posts.append({
-                'slug': file_path.stem,
-                'filename': file_path.name,
-                'title': front_matter.get('title', 'Untitled'),
-                'date': front_matter.get('date', ''),
-                'authors': front_matter.get('authors', []),
-                'draft': False,  # Published posts are not drafts
-                'tags': front_matter.get('tags', []),
-                'content': body,
-                'file_path': str(file_path)
-            })
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
-            continue
-
-    # Get draft posts
-    for file_path in DRAFT_DIR.glob('*.md'):
-        try:
-            content = file_path.read_text(encoding='utf-8')
-            front_matter, body = parse_front_matter(content)
-            posts.append({
-                'slug': file_path.stem,
-                'filename': file_path.name,
-                'title': front_matter.get('title', 'Untitled'),
-                'date': front_matter.get('date', ''),
-                'authors': front_matter.get('authors', []),
-                'draft': True,  # Draft posts are drafts
-                'tags': front_matter.get('tags', []),
-                'content': body,
-                'file_path': str(file_path)
-            })
-        except Exception as e:
-            print(f"Error reading draft {file_path}: {e}")
-            continue
-
-    posts.sort(key=lambda x: x.get('date', ''), reverse=True)
-    return posts
+    # The watcher keeps the index hot; only re-stat when it is not running
+    if not catalog_watcher.running:
+        await file_io.run_io(post_index.refresh)
+    return post_index.all()
+
+
+async def find_post(slug, draft=None):
+    """Resolve a filename stem, filename or slug to its post record.
+
+    Ambiguous keys resolve to None; ``draft`` narrows the lookup to one directory.
+    """
+    if not catalog_watcher.running:
+        await file_io.run_io(post_index.refresh)
+    return post_index.by_slug(slug, draft=draft)
 
 
 async def get_blog_post(slug):
-    """Get a blog post by slug, checking both published and draft directories"""
-    # Check published posts first
-    file_path = BLOG_DIR / f"{slug}.md"
-    if file_path.exists():
-        content = file_path.read_text(encoding='utf-8')
-        front_matter, body = parse_front_matter(content)
-        return {
-            'slug': slug,
-            'filename': file_path.name,
-            'title': front_matter.get('title', 'Untitled'),
-            'date': front_matter.get('date', ''),
-            'authors': front_matter.get('authors', []),
-            'draft': False,
-            'tags': front_matter.get('tags', []),
-            'content': body,
-            'file_path': str(file_path)
-        }
-    
-    # Check draft posts
-    file_path = DRAFT_DIR / f"{slug}.md"
-    if file_path.exists():
-        content = file_path.read_text(encoding='utf-8')
-        front_matter, body = parse_front_matter(content)
-        return {
-            'slug': slug,
-            'filename': file_path.name,
-            'title': front_matter.get('title', 'Untitled'),
-            'date': front_matter.get('date', ''),
-            'authors': front_matter.get('authors', []),
-            'draft': True,
-            'tags': front_matter.get('tags', []),
-            'content': body,
-            'file_path': str(file_path)
-        }
-    
-    return None
+    """Get a blog post by slug, checking both published and draft directories.
+
+    Listings only carry front matter; the body is loaded here, on demand.
+    """
+    post = await find_post(slug)
+    if not post:
+        return None
+    try:
+        return Post.from_meta(post, await file_io.run_io(read_post_body, post.file_path))
+    except FileNotFoundError:
+        post_index.discard(post.file_path)
+        return None
 
 # -----------------------------
 # Recent Activity Generation 
@@ -138,7 +66,7 @@ def generate_recent_activity(blog_posts):
     activity = []
     
     for post in blog_posts[:5]:  # Last 5 posts
-        post_date = datetime.strptime(post.get('date', ''), '%Y-%m-%d') if post.get('date') else datetime.now()
+        post_date = datetime.strptime(post.date, '%Y-%m-%d') if post.date else datetime.now()
         time_diff = datetime.now() - post_date
         
         if time_diff.days == 0:
@@ -152,24 +80,36 @@ def generate_recent_activity(blog_posts):
         else:
             time_ago = f"{time_diff.days // 30} months ago"
         
-        if post.get('draft'):
+        if post.draft:
             activity_type = 'draft'
-            description = f"Draft created: {post['title']}"
+            description = f"Draft created: {post.title}"
         else:
             activity_type = 'published'
-            description = f"Published: {post['title']}"
+            description = f"Published: {post.title}"
         
         activity.append({
             'type': activity_type,
             'title': 'Blog Post',
             'description': description,
             'time_ago': time_ago,
-            'draft': post.get('draft', False),
-            'date': post.get('date', '')
+            'draft': post.draft,
+            'date': post.date
         })
     
     return activity
 
+# -----------------------------
+# Catalog watcher lifecycle
+# -----------------------------
+@dashboard_bp.before_app_serving
+async def start_catalog_watcher():
+    await file_io.run_io(catalog_watcher.start)
+
+
+@dashboard_bp.after_app_serving
+async def stop_catalog_watcher():
+    await file_io.run_io(catalog_watcher.stop)
+
 # -----------------------------
 # Routes
 # -----------------------------
@@ -181,11 +121,12 @@ async def dashboard_home():
     recent_activity = generate_recent_activity(blog_posts)
 
     # Count posts in each directory
-    published_posts = [p for p in blog_posts if not p.get('draft')]
-    draft_posts = [p for p in blog_posts if p.get('draft')]
+    published_posts = [p for p in blog_posts if not p.draft]
+    draft_posts = [p for p in blog_posts if p.draft]
 
     context = {
         'session': {'email': session.get('user', 'Guest')},
+        'user_id': session.get('user_id'),
         'stats': {
             'total_posts': len(blog_posts),
             'published_posts': len(published_posts),
@@ -253,7 +194,7 @@ async def blog_create():
         
         filename = f"{date}-{slug}.{file_type}"
         
-        # Create front matter (remove draft field for published posts)
+        # Create front matter; the target directory decides draft status
         front_matter = {
             'title': title,
             'authors': authors,
@@ -262,10 +203,6 @@ async def blog_create():
             'slug': slug,
         }
         
-        # Add draft field only for actual drafts
-        if is_draft:
-            front_matter['draft'] = True
-        
         # Generate file content
         file_content = generate_blog_content(front_matter, content)
         
@@ -275,7 +212,8 @@ async def blog_create():
         else:
             save_path = BLOG_DIR / filename
         
-        save_path.write_text(file_content, encoding='utf-8')
+        await file_io.run_io(post_store.atomic_write, save_path, file_content)
+        await file_io.run_io(catalog_watcher.touch, save_path)
         
         return redirect(url_for('dashboard.blog_list'))
 
@@ -309,7 +247,7 @@ async def blog_edit(slug):
         
         # Determine if it's a draft
         is_draft = action == 'draft'
-        date = post.get('date', datetime.now().strftime('%Y-%m-%d'))
+        date = post.date or datetime.now().strftime('%Y-%m-%d')
         
         # Generate new filename with date prefix
         if not new_slug:
@@ -318,7 +256,7 @@ async def blog_edit(slug):
         
         new_filename = f"{date}-{new_slug}.{file_type}"
         
-        # Create updated front matter
+        # Create updated front matter; the target directory decides draft status
         front_matter = {
             'title': title,
             'authors': authors,
@@ -327,10 +265,6 @@ async def blog_edit(slug):
             'slug': new_slug,
         }
         
-        # Add draft field only for actual drafts
-        if is_draft:
-            front_matter['draft'] = True
-        
         # Generate file content
         file_content = generate_blog_content(front_matter, content)
         
@@ -340,13 +274,10 @@ async def blog_edit(slug):
         else:
             new_save_path = BLOG_DIR / new_filename
         
-        # If slug changed or status changed, remove old file
-        old_file_path = Path(post['file_path'])
-        if old_file_path.exists() and (new_slug != slug or is_draft != post['draft']):
-            old_file_path.unlink()
-        
-        # Save to appropriate directory
-        new_save_path.write_text(file_content, encoding='utf-8')
+        # Write the new file first, then drop the old one if the path changed
+        old_file_path = Path(post.file_path)
+        await file_io.run_io(post_store.save, new_save_path, file_content, replaces=old_file_path)
+        await file_io.run_io(catalog_watcher.touch, old_file_path, new_save_path)
         
         return redirect(url_for('dashboard.blog_list'))
 
@@ -362,32 +293,23 @@ async def blog_edit(slug):
 @dashboard_bp.route('/blogs/publish/<slug>', methods=['POST'])
 async def blog_publish(slug):
     """Move a draft to published posts and trigger build"""
-    draft_path = DRAFT_DIR / f"{slug}.md"
-    published_path = BLOG_DIR / f"{slug}.md"
-    
-    if not draft_path.exists():
+    post = await find_post(slug, draft=True)
+    if not post:
         return await render_template('404.html'), 404
     
+    draft_path = Path(post.file_path)
+    published_path = BLOG_DIR / post.filename
+    
     try:
-        # Read draft content
-        content = draft_path.read_text(encoding='utf-8')
-        front_matter, body = parse_front_matter(content)
-        
-        # Remove draft field from front matter
-        if 'draft' in front_matter:
-            del front_matter['draft']
+        # Older drafts carry a draft flag that would hide the published post
+        await file_io.run_io(post_store.strip_draft_flag, draft_path)
         
-        # Generate new content without draft field
-        new_content = generate_blog_content(front_matter, body)
-        
-        # Save to published directory
-        published_path.write_text(new_content, encoding='utf-8')
-        
-        # Remove from drafts
-        draft_path.unlink()
+        # Move into the published directory with a single rename
+        await file_io.run_io(post_store.move, draft_path, published_path)
+        await file_io.run_io(catalog_watcher.touch, draft_path, published_path)
         
         # Trigger Docusaurus build in background
-        build_manager.start_build(trigger_source=f"publish:{slug}")
+        build_manager.start_build(trigger_source=f"publish:{slug}", preempt=True)
         
         return redirect(url_for('dashboard.blog_list'))
     
@@ -397,8 +319,42 @@ async def blog_publish(slug):
 
 @dashboard_bp.route('/blogs/build-site', methods=['POST'])
 async def build_site():
-    """Manually trigger Docusaurus build"""
-    result = build_manager.start_build(trigger_source="manual")
+    """Manually trigger Docusaurus build (``?force=1`` rebuilds unchanged inputs,
+    repeated ``?target=`` limits the build to some targets)"""
+    force = request.args.get('force') == '1'
+    try:
+        result = build_manager.start_build(
+            trigger_source="manual",
+            force=force,
+            targets=request.args.getlist('target')
+        )
+    except ValueError as e:
+        return {'status': 'error', 'message': str(e)}, 400
+    return result
+
+@dashboard_bp.route('/api/build/cancel', methods=['POST'])
+async def cancel_build():
+    """Cancel the running build and kill its processes"""
+    return build_manager.cancel_build()
+
+@dashboard_bp.route('/api/releases')
+async def releases():
+    """Get the live and retained build outputs of every target"""
+    return await file_io.run_io(build_manager.get_releases)
+
+@dashboard_bp.route('/api/releases/rollback', methods=['POST'])
+async def rollback_release():
+    """Make an earlier build output live (``?target=`` and ``?release=``
+    are optional; by default every target goes back one release)"""
+    try:
+        result = await build_manager.rollback(
+            target=request.args.get('target'),
+            release=request.args.get('release')
+        )
+    except ValueError as e:
+        return {'status': 'error', 'message': str(e)}, 400
+    if result['status'] == 'error':
+        return result, 409
     return result
 
 @dashboard_bp.route('/api/build-status')
@@ -406,37 +362,79 @@ async def build_status():
     """Get current build status"""
     return build_manager.get_build_status()
 
+@dashboard_bp.route('/api/build-metrics')
+async def build_metrics():
+    """Get counters for pushed build status events"""
+    return build_manager.get_push_metrics()
+
+@dashboard_bp.route('/api/build-cache')
+async def build_cache():
+    """Get size and entry count of the persistent build cache"""
+    # Not on the file_io pool: the first call of a process walks the whole cache
+    return await asyncio.get_running_loop().run_in_executor(None, build_manager.cache.stats)
+
+@dashboard_bp.route('/api/session-metrics')
+async def session_metrics():
+    """Get session registry size and eviction counters"""
+    return await session_registry.metrics()
+
+@dashboard_bp.route('/api/status-metrics')
+async def status_metrics():
+    """Get computed, merged and suppressed status update counters"""
+    return status_publisher.metrics()
+
+@dashboard_bp.route('/api/lock-metrics')
+async def lock_metrics():
+    """Get per-user lock registry size and contention counters"""
+    return user_locks.metrics()
+
+@dashboard_bp.route('/api/catalog-stats')
+async def catalog_stats():
+    """Get blog catalog watcher statistics"""
+    return catalog_watcher.stats()
+
 @dashboard_bp.route('/api/build-history')
 async def build_history():
-    """Get build history"""
-    return {'history': build_manager.get_build_history()}
+    """Get build history, paginated with ``cursor``/``limit`` and filtered
+    by ``status``, ``trigger``, ``since`` and ``until`` (ISO dates)"""
+    args = request.args
+    try:
+        since = datetime.fromisoformat(args['since']) if args.get('since') else None
+        until = datetime.fromisoformat(args['until']) if args.get('until') else None
+        return await build_manager.get_build_history(
+            cursor=args.get('cursor'),
+            limit=args.get('limit', 20, type=int),
+            status=args.get('status'),
+            trigger=args.get('trigger'),
+            since=since,
+            until=until
+        )
+    except ValueError as e:
+        return {'error': f'Invalid query: {e}'}, 400
+
+@dashboard_bp.route('/api/build-trends')
+async def build_trends():
+    """Get per-day build counts and durations"""
+    return {'trends': await build_history_store.build_trends(
+        days=request.args.get('days', 30, type=int),
+        status=request.args.get('status')
+    )}
 
 
 @dashboard_bp.route('/blogs/unpublish/<slug>', methods=['POST'])
 async def blog_unpublish(slug):
     """Move a published post back to drafts"""
-    published_path = BLOG_DIR / f"{slug}.md"
-    draft_path = DRAFT_DIR / f"{slug}.md"
-    
-    if not published_path.exists():
+    post = await find_post(slug, draft=False)
+    if not post:
         return await render_template('404.html'), 404
     
+    published_path = Path(post.file_path)
+    draft_path = DRAFT_DIR / post.filename
+    
     try:
-        # Read published content
-        content = published_path.read_text(encoding='utf-8')
-        front_matter, body = parse_front_matter(content)
-        
-        # Add draft field to front matter
-        front_matter['draft'] = True
-        
-        # Generate new content with draft field
-        new_content = generate_blog_content(front_matter, body)
-        
-        # Save to draft directory
-        draft_path.write_text(new_content, encoding='utf-8')
-        
-        # Remove from published
-        published_path.unlink()
+        # Move back into the draft directory with a single rename
+        await file_io.run_io(post_store.move, published_path, draft_path)
+        await file_io.run_io(catalog_watcher.touch, published_path, draft_path)
         
         return redirect(url_for('dashboard.blog_list'))
     
@@ -447,15 +445,15 @@ async def blog_unpublish(slug):
 @dashboard_bp.route('/blogs/delete/<slug>', methods=['POST'])
 async def blog_delete(slug):
     """Delete a blog post (both draft and published)"""
-    post = await get_blog_post(slug)
+    post = await find_post(slug)
     if not post:
         return await render_template('404.html'), 404
     
     try:
         # Delete the file from its current location
-        file_path = Path(post['file_path'])
-        if file_path.exists():
-            file_path.unlink()
+        file_path = Path(post.file_path)
+        await file_io.run_io(post_store.delete, file_path)
+        await file_io.run_io(catalog_watcher.touch, file_path)
         
         return redirect(url_for('dashboard.blog_list'))
     
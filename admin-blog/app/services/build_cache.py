@@ -0,0 +1,181 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+# Persistent webpack/babel caches, one directory per site and lockfile. They
+# can grow to CACHE_MAX_BYTES, so they live in the user cache directory
+# rather than in the source tree unless BUILD_CACHE_DIR says otherwise.
+CACHE_ROOT = Path(os.getenv('BUILD_CACHE_DIR') or (
+    Path(os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache') / 'admin-blog' / 'build'
+))
+
+# Least recently used cache directories are pruned above this total size
+CACHE_MAX_BYTES = int(os.getenv('BUILD_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+
+
+class CacheLease:
+    """Cache directory handed to one target build, with its state before the build"""
+
+    def __init__(self, key, path, hit, snapshot):
+        self.key = key
+        self.path = path
+        self.hit = hit
+        self.snapshot = snapshot
+
+
+class BuildCache:
+    """Persistent build caches shared across builds of the same site.
+
+    Docusaurus keeps its webpack and babel caches in ``node_modules/.cache``;
+    each site's ``.cache`` is pointed at a directory owned here, keyed by
+    the site and the hash of its ``package-lock.json``, so a dependency
+    change starts from a fresh cache while the old one ages out. The same
+    directory is passed as ``CACHE_DIR``, which tools using find-cache-dir
+    honour. Directories are pruned least recently used first once the
+    total exceeds ``max_bytes``.
+    """
+
+    def __init__(self, root=CACHE_ROOT, max_bytes=CACHE_MAX_BYTES):
+        self.root = Path(root).resolve()
+        self.max_bytes = max_bytes
+        # Directories of builds in progress are never pruned
+        self._in_use = set()
+        self._lock = threading.Lock()
+        # Size of every cache directory as of the last acquire or prune, so
+        # stats() does not walk up to max_bytes of files on every request
+        self._sizes = None
+
+    def key_for(self, site_path):
+        """Cache key of a site: its path and the hash of its lockfile"""
+        site_path = Path(site_path)
+        digest = hashlib.sha256()
+        try:
+            digest.update((site_path / 'package-lock.json').read_bytes())
+        except FileNotFoundError:
+            digest.update(b'no-lockfile')
+        site = hashlib.sha256(str(site_path.resolve()).encode('utf-8')).hexdigest()
+        return f"{site[:8]}-{digest.hexdigest()[:16]}"
+
+    def acquire(self, site_path):
+        """Prepare the cache directory of a site before a build"""
+        key = self.key_for(site_path)
+        path = self.root / key
+        with self._lock:
+            self._in_use.add(path)
+        path.mkdir(parents=True, exist_ok=True)
+        os.utime(path)  # LRU order
+        self._link(Path(site_path), path)
+        snapshot = self._snapshot(path)
+        with self._lock:
+            if self._sizes is not None:
+                self._sizes[path] = sum(size for _, size in snapshot.values())
+        return CacheLease(key, path, bool(snapshot), snapshot)
+
+    def release(self, lease):
+        """Measure what the build reused from the cache, then prune"""
+        reused = written = bytes_saved = bytes_written = 0
+        for rel_path, signature in self._snapshot(lease.path).items():
+            if lease.snapshot.get(rel_path) == signature:
+                reused += 1
+                bytes_saved += signature[1]
+            else:
+                written += 1
+                bytes_written += signature[1]
+        with self._lock:
+            self._in_use.discard(lease.path)
+        self.prune()
+        return {
+            'key': lease.key,
+            'hit': lease.hit,
+            'hit_rate': round(reused / (reused + written), 3) if reused + written else 0.0,
+            'files_reused': reused,
+            'files_written': written,
+            'bytes_saved': bytes_saved,
+            'bytes_written': bytes_written
+        }
+
+    def prune(self):
+        """Delete least recently used cache directories above the size cap"""
+        if not self.root.is_dir():
+            with self._lock:
+                self._sizes = {}
+            return []
+        with self._lock:
+            entries = []
+            for path in self.root.iterdir():
+                if path.is_dir():
+                    entries.append((path.stat().st_mtime, path, self._size(path)))
+            entries.sort(reverse=True)
+
+            total = 0
+            removed = []
+            for _, path, size in entries:
+                total += size
+                if total > self.max_bytes and path not in self._in_use:
+                    shutil.rmtree(path, ignore_errors=True)
+                    total -= size
+                    removed.append(path.name)
+            self._sizes = {path: size for _, path, size in entries if path.name not in removed}
+            return removed
+
+    def stats(self):
+        """Total size and number of cache directories, as of the last build"""
+        with self._lock:
+            measured = self._sizes is not None
+        if not measured:
+            # Measured once per process; builds keep the totals up to date
+            self.prune()
+        with self._lock:
+            sizes = dict(self._sizes)
+        return {
+            'entries': len(sizes),
+            'size_bytes': sum(sizes.values()),
+            'max_bytes': self.max_bytes
+        }
+
+    @staticmethod
+    def _link(site_path, cache_path):
+        """Point ``node_modules/.cache`` of a site at a cache directory"""
+        node_modules = site_path / 'node_modules'
+        if not node_modules.is_dir():
+            return
+        link = node_modules / '.cache'
+        if link.is_symlink() and Path(os.readlink(link)) == cache_path:
+            return
+        if link.is_dir() and not link.is_symlink():
+            # Adopt a cache left by builds from before this subsystem
+            if any(cache_path.iterdir()):
+                shutil.rmtree(link)
+            else:
+                cache_path.rmdir()
+                shutil.move(str(link), str(cache_path))
+        temp_link = node_modules / f'.cache.{os.getpid()}.{time.monotonic_ns()}'
+        os.symlink(cache_path, temp_link)
+        os.replace(temp_link, link)
+
+    @staticmethod
+    def _snapshot(path):
+        files = {}
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                full_path = os.path.join(dir_path, file_name)
+                try:
+                    stat = os.stat(full_path)
+                except FileNotFoundError:
+                    continue
+                files[os.path.relpath(full_path, path)] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    @staticmethod
+    def _size(path):
+        total = 0
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                try:
+                    total += os.stat(os.path.join(dir_path, file_name)).st_size
+                except FileNotFoundError:
+                    continue
+        return total
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, func, or_, select
+
+from ..models import BuildRecord, async_session
+from .build_site import DEFAULT_TARGET
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(record):
+    """Opaque keyset cursor pointing just past ``record``"""
+    return f"{record.start_time.isoformat()}|{record.id}"
+
+
+def decode_cursor(cursor):
+    start_time, record_id = cursor.rsplit('|', 1)
+    return datetime.fromisoformat(start_time), int(record_id)
+
+
+async def save_build(build_info):
+    """Persist a finished build record"""
+    async with async_session() as db:
+        db.add(BuildRecord.from_build_info(build_info))
+        await db.commit()
+
+
+async def list_builds(cursor=None, limit=20, status=None, trigger=None, since=None, until=None):
+    """Page through build records, newest first.
+
+    Uses keyset pagination on ``(start_time, id)`` so every page costs the
+    same no matter how deep into the history it is.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    query = select(BuildRecord)
+
+    if cursor:
+        start_time, record_id = decode_cursor(cursor)
+        query = query.where(or_(
+            BuildRecord.start_time < start_time,
+            and_(BuildRecord.start_time == start_time, BuildRecord.id < record_id)
+        ))
+    if status:
+        query = query.where(BuildRecord.status == status)
+    if trigger:
+        query = query.where(BuildRecord.trigger_source.contains(trigger, autoescape=True))
+    if since:
+        query = query.where(BuildRecord.start_time >= since)
+    if until:
+        query = query.where(BuildRecord.start_time < until)
+
+    query = query.order_by(BuildRecord.start_time.desc(), BuildRecord.id.desc()).limit(limit + 1)
+
+    async with async_session() as db:
+        records = (await db.execute(query)).scalars().all()
+
+    has_more = len(records) > limit
+    records = records[:limit]
+    return {
+        'history': [record.to_dict() for record in records],
+        'next_cursor': encode_cursor(records[-1]) if has_more else None
+    }
+
+
+async def build_trends(days=30, status=None):
+    """Per-day build counts and durations, aggregated in SQL"""
+    day = func.date(BuildRecord.start_time)
+    query = (
+        select(
+            day.label('day'),
+            func.count(BuildRecord.id).label('builds'),
+            func.sum(case((BuildRecord.status == 'error', 1), else_=0)).label('failures'),
+            func.avg(BuildRecord.duration_seconds).label('avg_duration'),
+            func.max(BuildRecord.duration_seconds).label('max_duration'),
+        )
+        .where(BuildRecord.start_time >= datetime.now() - timedelta(days=int(days)))
+        .group_by(day)
+        .order_by(day)
+    )
+    if status:
+        query = query.where(BuildRecord.status == status)
+
+    async with async_session() as db:
+        rows = (await db.execute(query)).all()
+
+    return [
+        {
+            'day': row.day,
+            'builds': row.builds,
+            'failures': row.failures or 0,
+            'avg_duration': round(row.avg_duration, 3) if row.avg_duration is not None else None,
+            'max_duration': row.max_duration,
+        }
+        for row in rows
+    ]
+
+
+async def recent_timings(target, limit):
+    """Phase timings of the latest successful builds of one target"""
+    query = (
+        select(BuildRecord)
+        .where(BuildRecord.status.in_(('success', 'error')))
+        .order_by(BuildRecord.start_time.desc(), BuildRecord.id.desc())
+        .limit(limit)
+    )
+    async with async_session() as db:
+        records = (await db.execute(query)).scalars().all()
+
+    timings = []
+    for record in records:
+        build = record.to_dict()
+        # Builds from before build targets existed profiled the default site
+        result = build.get('targets', {}).get(target)
+        if result is None and target == DEFAULT_TARGET and 'targets' not in build:
+            result = build
+        if result and result['status'] == 'success' and result.get('timings'):
+            timings.append(result['timings'])
+    return timings
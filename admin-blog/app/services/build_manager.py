@@ -1,11 +1,27 @@
-import threading
-import subprocess
-import sys
-import json
-import time
-from pathlib import Path
+import asyncio
+import os
+from collections import defaultdict, deque
 from datetime import datetime
 from enum import Enum
+from .build_cache import BuildCache
+from .build_manifest import BuildManifest
+from .build_releases import ReleaseStore, release_root
+from .build_profile import REGRESSION_WINDOW, BuildProfiler, detect_regression
+from .build_site import DEFAULT_TARGET, LOGS_DIR, build_docusaurus_site, load_build_targets
+from . import build_history
+from ..utils.status import broadcast, broadcast_site
+
+# Socket.IO room of dashboard clients subscribed to live build output
+BUILD_LOG_ROOM = 'build_logs'
+
+# Socket.IO room of dashboard clients subscribed to build state transitions
+BUILD_STATUS_ROOM = 'build_status'
+
+# Interval of the dashboard's former status polling, used to count avoided polls
+LEGACY_POLL_INTERVAL = 2.0
+
+# Build targets run concurrently, each in its own npm/webpack process
+BUILD_WORKERS = int(os.getenv('BUILD_WORKERS', '0')) or os.cpu_count() or 1
 
 class BuildStatus(Enum):
     PENDING = "pending"
@@ -13,89 +29,400 @@ class BuildStatus(Enum):
     SUCCESS = "success"
     ERROR = "error"
     SKIPPED = "skipped"
+    CANCELLED = "cancelled"
 
 class BuildManager:
-    def __init__(self):
+    def __init__(self, debounce_seconds=None, targets=None, max_workers=BUILD_WORKERS):
         self.current_build = None
+        # Recent builds kept in memory for status; the full history is in SQLite
         self.build_history = []
         self.max_history = 10
         
-    def start_build(self, trigger_source="manual"):
-        """Start a new build in a non-blocking thread"""
-        if self.current_build and self.current_build.is_alive():
-            return {
-                'status': 'error',
-                'message': 'Build already in progress'
-            }
+        # Sites or locales to build, each with the manifest of its inputs
+        self.targets = {target.name: target for target in (targets or load_build_targets())}
+        self.manifests = {
+            name: BuildManifest(target.path, LOGS_DIR / self._manifest_name(name))
+            for name, target in self.targets.items()
+        }
+        self.releases = {
+            name: ReleaseStore(release_root(target))
+            for name, target in self.targets.items()
+        }
+        self.max_workers = max_workers
+        self.cache = BuildCache()
         
-        # Start build in background thread
-        self.current_build = threading.Thread(
-            target=self._run_build_process,
-            args=(trigger_source,),
-            daemon=True
-        )
-        self.current_build.start()
+        # Build pipelines of the running build by target, and why it is
+        # being cancelled (None while it is not)
+        self._pipelines = {}
+        self._cancel_reason = None
+        
+        # Triggers are collected until none arrived for ``debounce_seconds``,
+        # then served together by a single build
+        if debounce_seconds is None:
+            debounce_seconds = float(os.getenv('BUILD_DEBOUNCE_SECONDS', '5'))
+        self.debounce_seconds = debounce_seconds
+        self.pending_triggers = []
+        self._pending_targets = set()
+        self._pending_force = False
+        self._last_trigger = 0.0
+        self._wakeup = None
+        self._scheduler = None
+        
+        # Bounded buffer of the latest build output, replayed to new subscribers
+        self.log_lines = deque(maxlen=int(os.getenv('BUILD_LOG_LINES', '500')))
+        
+        # Sockets receiving pushed status events, and the polls they saved
+        self.status_subscribers = set()
+        self.status_events_sent = 0
+        self.polls_avoided = 0.0
+        self._active_since = None
+        
+        # Status emits started from synchronous callers, kept until they finish
+        self._background = set()
+    
+    @staticmethod
+    def _manifest_name(target_name):
+        if target_name == DEFAULT_TARGET:
+            return 'manifest.json'
+        return f'manifest_{target_name}.json'
+        
+    def start_build(self, trigger_source="manual", force=False, targets=None, preempt=False):
+        """Queue a build trigger for the scheduler.
+        
+        Triggers arriving while a build runs are merged into exactly one
+        follow-up build instead of being rejected. ``targets`` limits the
+        build to some of the configured target names; all are built by
+        default. With ``preempt`` a running build, which builds older
+        content, is cancelled and its triggers are folded into the next one.
+        """
+        targets = list(targets or self.targets)
+        unknown = [name for name in targets if name not in self.targets]
+        if unknown:
+            raise ValueError(f"Unknown build target(s): {', '.join(unknown)}")
+        
+        self._ensure_scheduler()
         
+        preempted = preempt and self.current_build and self._cancel_reason is None
+        if preempted:
+            self.pending_triggers[:0] = self.current_build['trigger_sources']
+            self._pending_targets.update(self.current_build['targets'])
+            self._pending_force = self._pending_force or self.current_build['force']
+            self.cancel_build(f'Superseded by {trigger_source}')
+        
+        self.pending_triggers.append(trigger_source)
+        self._pending_targets.update(targets)
+        self._pending_force = self._pending_force or force
+        self._last_trigger = asyncio.get_running_loop().time()
+        self._wakeup.set()
+        self._emit_status_soon()
+        
+        if preempted:
+            message = 'Running build cancelled, rebuilding with the latest changes'
+        elif self.current_build:
+            message = 'Build queued to run after the current build'
+        else:
+            message = f'Build queued, starting in {self.debounce_seconds:g}s'
         return {
-            'status': 'started',
-            'message': 'Build started in background'
+            'status': 'queued',
+            'message': message,
+            'pending_triggers': list(self.pending_triggers),
+            'targets': sorted(self._pending_targets)
         }
     
-    def _run_build_process(self, trigger_source):
-        """Run the build process and capture results"""
+    def cancel_build(self, reason='Cancelled by user'):
+        """Stop the running build, killing the process tree of every target"""
+        if not self.current_build:
+            return {'status': 'idle', 'message': 'No build in progress'}
+        
+        if self._cancel_reason is None:
+            self._cancel_reason = reason
+            for pipeline in list(self._pipelines.values()):
+                pipeline.cancel()
+        return {'status': 'cancelling', 'message': self._cancel_reason}
+    
+    def _emit_status_soon(self):
+        """Emit the status from a synchronous caller, in a task the manager keeps"""
+        task = asyncio.get_running_loop().create_task(self._emit_status())
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+    
+    def _background_done(self, task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"Build status emit error: {task.exception()}")
+    
+    def _ensure_scheduler(self):
+        """Start the scheduler task on the running loop if it is not alive"""
+        loop = asyncio.get_running_loop()
+        if self._scheduler and not self._scheduler.done() and self._scheduler.get_loop() is loop:
+            return
+        self._wakeup = asyncio.Event()
+        self._scheduler = loop.create_task(self._schedule())
+    
+    async def _schedule(self):
+        """Debounce queued triggers and run one build per batch"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            
+            # Wait until no new trigger arrived for a whole debounce window
+            while True:
+                delay = self._last_trigger + self.debounce_seconds - loop.time()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            
+            self._wakeup.clear()
+            triggers, targets, force = self.pending_triggers, self._pending_targets, self._pending_force
+            self.pending_triggers, self._pending_targets, self._pending_force = [], set(), False
+            
+            try:
+                # Keep the configured order of the targets
+                await self._run_build_process(triggers, force, [t for t in self.targets if t in targets])
+            except Exception as e:
+                print(f"Build scheduler error: {e}")
+    
+    async def _run_build_process(self, trigger_sources, force=False, target_names=None):
+        """Build every requested target on a bounded pool of workers.
+        
+        Each target gets its own process, log and status; a failing target
+        does not stop the others. Targets sharing a site directory are built
+        one after another, as Docusaurus writes its generated files there.
+        """
+        target_names = target_names or list(self.targets)
         build_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         build_info = {
             'id': build_id,
             'status': BuildStatus.BUILDING.value,
             'start_time': datetime.now().isoformat(),
-            'trigger_source': trigger_source,
+            'trigger_source': ', '.join(trigger_sources),
+            'trigger_sources': list(trigger_sources),
             'log_file': None,
             'message': None,
             'end_time': None,
-            'duration': None
+            'duration': None,
+            'changed_inputs': None,
+            'force': force,
+            'targets': {
+                name: {
+                    'name': name,
+                    'locale': self.targets[name].locale,
+                    'status': BuildStatus.PENDING.value,
+                    'message': None,
+                    'log_file': None,
+                    'changed_inputs': None,
+                    'timings': None,
+                    'regression': None,
+                    'cache': None,
+                    'release': None,
+                    'sitemap_error': None,
+                    'duration': None
+                }
+                for name in target_names
+            }
         }
+        self.current_build = build_info
+        self._pipelines = {}
+        self._cancel_reason = None
+        self.log_lines.clear()
+        await self._emit_status()
         
-        try:
-            # Run the build script
-            build_script = Path(__file__).parent / 'build_site.py'
-            result = subprocess.run(
-                [sys.executable, str(build_script)],
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout
-            )
+        workers = asyncio.Semaphore(self.max_workers)
+        site_locks = defaultdict(asyncio.Lock)
+        await asyncio.gather(*(
+            self._run_target(build_id, build_info['targets'][name], force,
+                             workers, site_locks[self.targets[name].path])
+            for name in target_names
+        ))
+        
+        await self._finish_build(build_info, self._combine_results(build_info['targets']))
+    
+    async def _run_target(self, build_id, record, force, workers, site_lock):
+        """Build one target and complete its record; never raises"""
+        loop = asyncio.get_running_loop()
+        name = record['name']
+        manifest_store = self.manifests[name]
+        
+        async with site_lock, workers:
+            if self._cancel_reason:
+                record.update(self._cancelled_result())
+                await self._emit_status()
+                return
+            
+            started = datetime.now()
+            record['status'] = BuildStatus.BUILDING.value
+            await self._emit_status()
             
-            # Parse result
-            if result.returncode == 0:
-                build_result = json.loads(result.stdout)
-            else:
-                build_result = {
+            try:
+                # Skip the target when no input changed since its last successful
+                # build, as long as that build is still the live release; manifests
+                # saved by builds into build/ do not count
+                previous_manifest = await loop.run_in_executor(None, manifest_store.load)
+                manifest = await loop.run_in_executor(None, manifest_store.compute, previous_manifest)
+                changed_inputs = manifest_store.changed_inputs(previous_manifest, manifest)
+                record['changed_inputs'] = changed_inputs
+                live = await loop.run_in_executor(None, self.releases[name].current)
+                
+                if not changed_inputs and not force and live:
+                    result = {
+                        'status': BuildStatus.SKIPPED.value,
+                        'message': 'No build inputs changed since the last successful build'
+                    }
+                else:
+                    result = await self._run_pipeline(build_id, name, record)
+                    if result.get('status') == BuildStatus.SUCCESS.value:
+                        await loop.run_in_executor(None, manifest_store.save, manifest)
+                    
+            except Exception as e:
+                result = {
                     'status': 'error',
-                    'message': 'Build script failed to execute',
-                    'error': result.stderr
+                    'message': f'Build process error: {str(e)}'
                 }
-                
-        except subprocess.TimeoutExpired:
-            build_result = {
-                'status': 'error',
-                'message': 'Build timed out'
+            
+            record.update(result)
+            record['duration'] = str(datetime.now() - started)
+            await self._emit_status()
+    
+    async def _run_pipeline(self, build_id, name, record):
+        """Run the build pipeline of one target, streaming its output"""
+        loop = asyncio.get_running_loop()
+        target = self.targets[name]
+        output = await loop.run_in_executor(None, self.releases[name].prepare, build_id)
+        lease = await loop.run_in_executor(None, self.cache.acquire, target.path)
+        profiler = BuildProfiler(loop.time())
+        
+        async def on_output(stream, line):
+            profiler.feed(line, loop.time())
+            await self._publish_log_line(build_id, name, stream, line)
+        
+        # Run as its own task so that cancel_build can cancel just the pipelines
+        pipeline = loop.create_task(
+            build_docusaurus_site(target, on_output=on_output, cache_dir=lease.path, out_dir=output)
+        )
+        self._pipelines[name] = pipeline
+        if self._cancel_reason:
+            pipeline.cancel()
+        try:
+            result = await pipeline
+        except asyncio.CancelledError:
+            if not pipeline.cancelled() or self._cancel_reason is None:
+                raise
+            result = self._cancelled_result()
+        finally:
+            self._pipelines.pop(name, None)
+            record['timings'] = profiler.finish(loop.time())
+            record['cache'] = await asyncio.shield(
+                loop.run_in_executor(None, self.cache.release, lease)
+            )
+        
+        await self._publish_release(name, output, result, record)
+        return result
+    
+    async def _publish_release(self, name, output, result, record):
+        """Make the output of a successful build live, drop any other output"""
+        loop = asyncio.get_running_loop()
+        store = self.releases[name]
+        if result.get('status') != BuildStatus.SUCCESS.value:
+            await loop.run_in_executor(None, store.discard, output)
+            return
+        
+        await loop.run_in_executor(None, store.activate, output)
+        record['release'] = output.name
+        # Old releases are deleted in the background; the build does not wait
+        loop.run_in_executor(None, store.collect)
+    
+    def get_releases(self):
+        """Live and retained releases of every target"""
+        return {name: store.describe() for name, store in self.releases.items()}
+    
+    async def rollback(self, target=None, release=None):
+        """Make an earlier release live again, by default the previous one.
+        
+        Without ``target`` every target rolls back. The target's manifest
+        forgets its inputs so that the next build is not skipped.
+        """
+        names = [target] if target else list(self.targets)
+        if target not in (None, *self.targets):
+            raise ValueError(f'Unknown build target: {target}')
+        
+        loop = asyncio.get_running_loop()
+        rolled_back, errors = {}, {}
+        for name in names:
+            try:
+                rolled_back[name] = await loop.run_in_executor(None, self.releases[name].rollback, release)
+            except ValueError as e:
+                errors[name] = str(e)
+                continue
+            await loop.run_in_executor(None, self._forget_inputs, name)
+        return {
+            'status': 'success' if rolled_back else 'error',
+            'releases': rolled_back,
+            'errors': errors
+        }
+    
+    def _forget_inputs(self, name):
+        manifest_store = self.manifests[name]
+        manifest = manifest_store.load()
+        manifest['inputs'] = {}
+        manifest_store.save(manifest)
+    
+    def _cancelled_result(self):
+        return {
+            'status': BuildStatus.CANCELLED.value,
+            'message': f'Build cancelled: {self._cancel_reason}'
+        }
+    
+    @staticmethod
+    def _combine_results(records):
+        """Overall result of a build from the results of its targets"""
+        records = list(records.values())
+        if len(records) == 1:
+            record = records[0]
+            return {key: record[key] for key in ('status', 'message', 'log_file', 'error') if key in record}
+        
+        cancelled = [r for r in records if r['status'] == BuildStatus.CANCELLED.value]
+        if cancelled:
+            return {
+                'status': BuildStatus.CANCELLED.value,
+                'message': cancelled[0]['message']
             }
-        except json.JSONDecodeError:
-            build_result = {
-                'status': 'error', 
-                'message': 'Invalid build output',
-                'error': result.stderr if result else 'No output'
+        failed = [r['name'] for r in records if r['status'] == BuildStatus.ERROR.value]
+        built = [r['name'] for r in records if r['status'] == BuildStatus.SUCCESS.value]
+        if failed:
+            return {
+                'status': BuildStatus.ERROR.value,
+                'message': f"{len(failed)} of {len(records)} targets failed: {', '.join(failed)}"
             }
-        except Exception as e:
-            build_result = {
-                'status': 'error',
-                'message': f'Build process error: {str(e)}'
+        if not built:
+            return {
+                'status': BuildStatus.SKIPPED.value,
+                'message': 'No build inputs changed since the last successful build'
             }
-        
+        return {
+            'status': BuildStatus.SUCCESS.value,
+            'message': f"Built {len(built)} of {len(records)} targets: {', '.join(built)}"
+        }
+    
+    async def _publish_log_line(self, build_id, target, stream, line):
+        """Keep a line in the bounded log buffer and push it to subscribers"""
+        entry = {'build_id': build_id, 'target': target, 'stream': stream, 'line': line}
+        self.log_lines.append(entry)
+        await broadcast('build_log', entry, room=BUILD_LOG_ROOM)
+    
+    def get_build_log(self, target=None):
+        """Buffered output lines of the current or last build"""
+        return [e for e in self.log_lines if target is None or e['target'] == target]
+    
+    async def _finish_build(self, build_info, build_result):
+        """Complete a build record and add it to the history"""
         # Update build info
         build_info.update(build_result)
         build_info['end_time'] = datetime.now().isoformat()
+        build_info['changed_inputs'] = sorted({
+            name for record in build_info['targets'].values()
+            for name in record['changed_inputs'] or ()
+        })
         
         # Calculate duration
         start = datetime.fromisoformat(build_info['start_time'])
@@ -106,40 +433,128 @@ class BuildManager:
         self.build_history.insert(0, build_info)
         if len(self.build_history) > self.max_history:
             self.build_history = self.build_history[:self.max_history]
+        self.current_build = None
+        
+        # Compare each target with its earlier builds before this one joins the window
+        for name, record in build_info['targets'].items():
+            if record['status'] != BuildStatus.SUCCESS.value or not record.get('timings'):
+                continue
+            try:
+                previous = await build_history.recent_timings(name, REGRESSION_WINDOW)
+                record['regression'] = detect_regression(record['timings'], previous)
+                if record['regression'] and record['regression']['regressed']:
+                    print(f"Build {build_info['id']} target {name} is "
+                          f"{record['regression']['slowdown_pct']}% slower than the median; "
+                          f"slower phases: {', '.join(record['regression']['regressed_phases']) or 'none'}")
+            except Exception as e:
+                print(f"Error checking build {build_info['id']} target {name} for regressions: {e}")
+        
+        try:
+            await build_history.save_build(build_info)
+        except Exception as e:
+            print(f"Error saving build {build_info['id']}: {e}")
+        
+        # Report the outcome first, then any follow-up build already queued
+        await self._emit_status(self._summarize(build_info))
+        await broadcast_site('site_event', {
+            'type': 'build_finished',
+            'build_id': build_info['id'],
+            'status': build_info['status'],
+            'end_time': build_info['end_time']
+        })
+        if self.pending_triggers:
+            await self._emit_status()
+    
+    def add_status_subscriber(self, sid):
+        self.status_subscribers.add(sid)
+    
+    def remove_status_subscriber(self, sid):
+        self.status_subscribers.discard(sid)
+    
+    async def _emit_status(self, status=None):
+        """Push a build state transition to subscribed dashboard clients"""
+        status = status or self.get_build_status()
+        self._count_polls_avoided(status['status'])
+        if await broadcast('build_status', status, room=BUILD_STATUS_ROOM):
+            self.status_events_sent += 1
+    
+    def _count_polls_avoided(self, new_status):
+        """Credit the polls subscribers would have made while a build was active"""
+        now = datetime.now()
+        if self._active_since is not None:
+            elapsed = (now - self._active_since).total_seconds()
+            self.polls_avoided += len(self.status_subscribers) * elapsed / LEGACY_POLL_INTERVAL
+        active = new_status in (BuildStatus.PENDING.value, BuildStatus.BUILDING.value)
+        self._active_since = now if active else None
+    
+    def get_push_metrics(self):
+        """Counters for pushed build status events"""
+        return {
+            'status_subscribers': len(self.status_subscribers),
+            'status_events_sent': self.status_events_sent,
+            'polls_avoided': int(self.polls_avoided),
+            'legacy_poll_interval': LEGACY_POLL_INTERVAL
+        }
+    
+    @staticmethod
+    def _summarize(build):
+        """Status payload of a finished build record"""
+        return {
+            'status': build['status'],
+            'message': build.get('message', 'Build completed'),
+            'log_file': build.get('log_file'),
+            'duration': build.get('duration'),
+            'trigger_source': build.get('trigger_source'),
+            'trigger_sources': build.get('trigger_sources'),
+            'changed_inputs': build.get('changed_inputs'),
+            'targets': build.get('targets')
+        }
     
     def get_build_status(self):
         """Get current build status"""
-        if not self.current_build:
+        if self.current_build:
+            targets = self.current_build['targets']
+            done = sum(1 for r in targets.values()
+                       if r['status'] not in (BuildStatus.PENDING.value, BuildStatus.BUILDING.value))
             return {
-                'status': 'idle',
-                'message': 'No build in progress'
+                'status': 'building',
+                'message': f'Build in progress ({done}/{len(targets)} targets done)...',
+                'trigger_source': self.current_build['trigger_source'],
+                'pending_triggers': list(self.pending_triggers),
+                'targets': {name: {'status': r['status'], 'message': r['message']}
+                            for name, r in targets.items()}
             }
         
-        if self.current_build.is_alive():
+        if self.pending_triggers:
             return {
-                'status': 'building',
-                'message': 'Build in progress...'
+                'status': BuildStatus.PENDING.value,
+                'message': f'Build queued for {len(self.pending_triggers)} trigger(s)',
+                'pending_triggers': list(self.pending_triggers)
             }
         
-        # Get the latest completed build
-        if self.build_history and self.build_history[0]['end_time']:
-            latest_build = self.build_history[0]
+        if not self.build_history:
             return {
-                'status': latest_build['status'],
-                'message': latest_build.get('message', 'Build completed'),
-                'log_file': latest_build.get('log_file'),
-                'duration': latest_build.get('duration'),
-                'trigger_source': latest_build.get('trigger_source')
+                'status': 'idle',
+                'message': 'No build in progress'
             }
         
+        # Get the latest completed build
+        if self.build_history and self.build_history[0]['end_time']:
+            return self._summarize(self.build_history[0])
+        
         return {
             'status': 'unknown',
             'message': 'Build status unknown'
         }
     
-    def get_build_history(self):
-        """Get build history"""
-        return self.build_history
+    async def get_build_history(self, cursor=None, limit=20, **filters):
+        """Get a page of persisted build history, newest first"""
+        return await build_history.list_builds(cursor=cursor, limit=limit, **filters)
+    
+    async def load_recent_builds(self):
+        """Restore the in-memory recent builds from SQLite after a restart"""
+        page = await build_history.list_builds(limit=self.max_history)
+        self.build_history = page['history']
 
 # Global build manager instance
 build_manager = BuildManager()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Files and directories whose content decides what the Docusaurus build produces:
+# content, site code (pages, components, custom CSS), config and dependencies
+BUILD_INPUTS = (
+    'blog', 'docs', 'i18n', 'src', 'static',
+    'sidebars.js', 'docusaurus.config.js', 'package.json', 'package-lock.json',
+    'generate-sitemaps.js',
+)
+
+
+class BuildManifest:
+    """Content hashes of the Docusaurus build inputs, stored between builds.
+
+    File digests are cached against ``(mtime_ns, size)`` so only files that
+    changed since the last computation are re-hashed.
+    """
+
+    def __init__(self, root, manifest_path, inputs=BUILD_INPUTS):
+        self.root = Path(root)
+        self.manifest_path = Path(manifest_path)
+        self.inputs = inputs
+
+    def load(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'inputs': {}, 'files': {}}
+
+    def save(self, manifest):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+    def compute(self, previous=None):
+        """Hash every build input, reusing digests of unchanged files"""
+        cached = (previous or self.load()).get('files', {})
+        files = {}
+        inputs = {}
+
+        for name in self.inputs:
+            digest = hashlib.sha256()
+            for rel_path in self._walk(name):
+                full_path = self.root / rel_path
+                try:
+                    stat = full_path.stat()
+                except FileNotFoundError:
+                    continue
+                signature = [stat.st_mtime_ns, stat.st_size]
+                entry = cached.get(rel_path)
+                if entry and entry[:2] == signature:
+                    file_digest = entry[2]
+                else:
+                    file_digest = self._hash_file(full_path)
+                files[rel_path] = signature + [file_digest]
+                digest.update(f"{rel_path}\0{file_digest}\n".encode('utf-8'))
+            inputs[name] = digest.hexdigest()
+
+        return {'inputs': inputs, 'files': files}
+
+    @staticmethod
+    def changed_inputs(previous, current):
+        """Names of inputs whose digest differs between two manifests"""
+        old = previous.get('inputs', {})
+        return [name for name, digest in current['inputs'].items() if old.get(name) != digest]
+
+    def _walk(self, name):
+        path = self.root / name
+        if path.is_file():
+            yield name
+            return
+        if not path.is_dir():
+            return
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            rel_dir = os.path.relpath(dir_path, self.root)
+            for file_name in sorted(file_names):
+                yield os.path.join(rel_dir, file_name)
+
+    @staticmethod
+    def _hash_file(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
@@ -0,0 +1,136 @@
+import os
+import re
+from statistics import median
+
+# Build phases in the order they run, with the output marker that starts
+# them and the phase the build must have reached for the marker to count.
+# The sitemap phase starts at the command line the pipeline echoes before
+# running SITEMAP_SCRIPT; sites without the script have no such phase.
+# A phase ends when the next one starts; phases whose marker never appears
+# are simply left out.
+BUILD_PHASES = (
+    ('spawn', None, None),
+    ('npm_bootstrap', None, None),  # first output line
+    ('webpack_compile', re.compile(r'Creating an optimized production build'), 'npm_bootstrap'),
+    ('static_generation', None, None),  # client and server bundles compiled
+    ('postbuild', re.compile(r'Generated static files'), 'webpack_compile'),
+    ('sitemap', re.compile(r'generate-sitemaps(\.js)?'), 'webpack_compile'),
+)
+
+# webpackbar summary lines: "✔ Client: Compiled successfully in 14.58s" (v3)
+# or "✔ Client" followed by "Compiled successfully in 14.58s" (v2)
+WEBPACK_TARGET = re.compile(r'✔\s*(Client|Server)\b')
+WEBPACK_COMPILED = re.compile(r'Compiled successfully in ([\d.]+)\s*(m?s)\b')
+
+# A build is flagged when it is this many percent slower than the median
+REGRESSION_THRESHOLD = float(os.getenv('BUILD_REGRESSION_THRESHOLD', '20'))
+
+# Phases are only flagged once they are at least this many seconds slower,
+# so sub-second phases do not trip the percentage threshold on jitter
+REGRESSION_MIN_SECONDS = 1.0
+
+# Number of earlier successful builds the rolling median is taken over
+REGRESSION_WINDOW = int(os.getenv('BUILD_REGRESSION_WINDOW', '20'))
+
+
+class BuildProfiler:
+    """Derive per-phase timings of a Docusaurus build from its output.
+
+    Feed every output line with the loop time it arrived at; ``finish``
+    returns the phase durations in seconds, plus the client and server
+    compile times webpack reported itself.
+    """
+
+    def __init__(self, started_at):
+        self._phase_names = [name for name, _, _ in BUILD_PHASES]
+        self._current = 0
+        self._phase_start = started_at
+        self.phases = {}
+        self.webpack = {}
+        self._webpack_target = None
+
+    @property
+    def current_phase(self):
+        return self._phase_names[self._current]
+
+    def _enter(self, name, now):
+        index = self._phase_names.index(name)
+        if index <= self._current:
+            return
+        self.phases[self.current_phase] = round(now - self._phase_start, 3)
+        self._current = index
+        self._phase_start = now
+
+    def feed(self, line, now):
+        """Account for one line of build output"""
+        if self.current_phase == 'spawn':
+            self._enter('npm_bootstrap', now)
+
+        for name, marker, reached in BUILD_PHASES:
+            if marker is None or self._current < self._phase_names.index(reached):
+                continue
+            if marker.search(line):
+                self._enter(name, now)
+
+        target = WEBPACK_TARGET.search(line)
+        if target:
+            self._webpack_target = target.group(1).lower()
+        compiled = WEBPACK_COMPILED.search(line)
+        if compiled and self._webpack_target:
+            seconds = float(compiled.group(1))
+            if compiled.group(2) == 'ms':
+                seconds /= 1000
+            self.webpack[self._webpack_target] = seconds
+            self._webpack_target = None
+            if len(self.webpack) == 2:
+                self._enter('static_generation', now)
+
+    def finish(self, now):
+        """Close the running phase and return the collected timings"""
+        self.phases[self.current_phase] = round(now - self._phase_start, 3)
+        return {
+            'phases': dict(self.phases),
+            'webpack': dict(self.webpack),
+            'total': round(sum(self.phases.values()), 3)
+        }
+
+
+def detect_regression(timings, previous, threshold=REGRESSION_THRESHOLD):
+    """Compare a build's timings with the rolling median of earlier builds.
+
+    ``previous`` holds the timings of earlier successful builds. Returns
+    None until there is anything to compare with.
+    """
+    totals = [t['total'] for t in previous if t.get('total')]
+    if not totals:
+        return None
+
+    def slowdown(value, baseline):
+        return round(100 * (value - baseline) / baseline, 1) if baseline else 0.0
+
+    baseline = median(totals)
+    phases = {}
+    for name, seconds in timings['phases'].items():
+        samples = [t['phases'][name] for t in previous if name in t.get('phases', {})]
+        if samples:
+            phase_baseline = median(samples)
+            phases[name] = {
+                'seconds': seconds,
+                'median': round(phase_baseline, 3),
+                'slowdown_pct': slowdown(seconds, phase_baseline)
+            }
+
+    slowdown_pct = slowdown(timings['total'], baseline)
+    return {
+        'regressed': slowdown_pct > threshold,
+        'threshold_pct': threshold,
+        'median_seconds': round(baseline, 3),
+        'slowdown_pct': slowdown_pct,
+        'sample_size': len(totals),
+        'phases': phases,
+        'regressed_phases': [
+            name for name, stats in phases.items()
+            if stats['slowdown_pct'] > threshold
+            and stats['seconds'] - stats['median'] >= REGRESSION_MIN_SECONDS
+        ]
+    }
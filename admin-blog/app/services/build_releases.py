@@ -0,0 +1,111 @@
+import os
+import shutil
+import time
+from pathlib import Path
+
+# Number of successful build outputs kept per target for instant rollback
+KEEP_RELEASES = int(os.getenv('BUILD_KEEP_RELEASES', '5'))
+
+# Name of the symlink pointing at the live output of a target
+CURRENT_LINK = 'current'
+
+
+def release_root(target):
+    """Directory holding the releases of a build target; ``releases/<name>``
+    inside the site unless BUILD_RELEASES_DIR is set"""
+    root = os.getenv('BUILD_RELEASES_DIR')
+    return Path(root or Path(target.path) / 'releases') / target.name
+
+
+class ReleaseStore:
+    """Versioned build outputs of one target behind an atomically swapped symlink.
+
+    Every build writes into its own directory under ``root``; only a
+    successful build flips ``root/current`` to it, so the served site is
+    never partially overwritten and a failed build leaves nothing behind.
+    The web server serves ``current`` (``current/<locale>`` for locale
+    targets, as Docusaurus nests those).
+    """
+
+    def __init__(self, root, keep=KEEP_RELEASES):
+        self.root = Path(root)
+        self.keep = keep
+
+    @property
+    def current_link(self):
+        return self.root / CURRENT_LINK
+
+    def prepare(self, release_id):
+        """Fresh directory for the output of a build"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / release_id
+        suffix = 1
+        while path.exists():
+            path = self.root / f'{release_id}_{suffix}'
+            suffix += 1
+        return path
+
+    def current(self):
+        """Name of the live release, or None"""
+        try:
+            return os.readlink(self.current_link)
+        except (FileNotFoundError, OSError):
+            return None
+
+    def releases(self):
+        """Release names, newest first"""
+        if not self.root.is_dir():
+            return []
+        names = [
+            path.name for path in self.root.iterdir()
+            if path.is_dir() and not path.is_symlink() and not path.name.startswith('.')
+        ]
+        return sorted(names, reverse=True)
+
+    def activate(self, path):
+        """Atomically make a release the live output"""
+        path = Path(path)
+        if path.parent != self.root or not path.is_dir():
+            raise ValueError(f'Not a release of {self.root}: {path.name}')
+        # The link is relative so the release tree can be moved or mounted elsewhere
+        temp_link = self.root / f'.{CURRENT_LINK}.{os.getpid()}.{time.monotonic_ns()}'
+        os.symlink(path.name, temp_link)
+        os.replace(temp_link, self.current_link)
+
+    def rollback(self, release=None):
+        """Make ``release`` live, by default the one before the current release"""
+        releases = self.releases()
+        if release is None:
+            current = self.current()
+            older = [name for name in releases if current is None or name < current]
+            if not older:
+                raise ValueError('No earlier release to roll back to')
+            release = older[0]
+        elif release not in releases:
+            raise ValueError(f'Unknown release: {release}')
+        self.activate(self.root / release)
+        return release
+
+    def discard(self, path):
+        """Remove the output of a build that did not succeed"""
+        path = Path(path)
+        if path.parent == self.root and path.name != self.current():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def collect(self):
+        """Delete releases beyond the newest ``keep``, never the live one"""
+        current = self.current()
+        removed = []
+        for name in self.releases()[self.keep:]:
+            if name != current:
+                shutil.rmtree(self.root / name, ignore_errors=True)
+                removed.append(name)
+        return removed
+
+    def describe(self):
+        current = self.current()
+        return {
+            'current': current,
+            'releases': [{'id': name, 'current': name == current} for name in self.releases()]
+        }
+
@@ -1,29 +1,140 @@
 #!/usr/bin/env python3
+import asyncio
+import functools
 import os
-import subprocess
+import queue
+import signal
 import sys
 import json
+import threading
+from collections import deque, namedtuple
 from pathlib import Path
 from datetime import datetime
 
-def build_docusaurus_site():
-    """Build Docusaurus site only for published blogs"""
+# Path to your Docusaurus project
+DOCU_PATH = Path('/mnt/NewVolume/git/Doc/Docs-QT-PyQt-PySide-Custom-Widgets')
+
+# Build logs directory
+LOGS_DIR = Path(__file__).parent / 'build_logs'
+
+# Seconds before a running npm build is killed
+BUILD_TIMEOUT = 300
+
+# Seconds a cancelled build gets to stop after SIGTERM before it is killed
+TERMINATE_GRACE = 5.0
+
+# Script run after a successful build, in sites that have it, to derive the
+# per-subdomain sitemaps from the sitemap.xml of the output directory. Its
+# failure is reported as ``sitemap_error`` but does not fail the build.
+SITEMAP_SCRIPT = 'generate-sitemaps.js'
+
+# Name of the single target built when BUILD_TARGETS is not set
+DEFAULT_TARGET = 'default'
+
+# One Docusaurus site, or one locale of it, built by its own npm process
+BuildTarget = namedtuple('BuildTarget', ['name', 'path', 'locale'], defaults=[None])
+
+def load_build_targets():
+    """Build targets configured in the BUILD_TARGETS environment variable.
+    
+    BUILD_TARGETS is a JSON list of ``{"name", "path", "locale"}`` objects,
+    where ``path`` defaults to DOCU_PATH. Without it the site at DOCU_PATH
+    is the only target.
+    """
+    raw = os.getenv('BUILD_TARGETS')
+    if not raw:
+        return [BuildTarget(DEFAULT_TARGET, DOCU_PATH)]
+    return [
+        BuildTarget(t['name'], Path(t.get('path') or DOCU_PATH), t.get('locale'))
+        for t in json.loads(raw)
+    ]
+
+class BuildLog:
+    """Build log file written by a thread of its own.
+
+    ``write`` only queues the text, so a slow disk never holds up the event
+    loop that streams the build output. The thread flushes once per burst
+    of queued lines and closes the file after ``close``.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        # Not a daemon, so the CLI still finishes writing the log when it exits
+        self._thread = threading.Thread(target=self._run, name=f'build-log-{Path(path).stem}')
+        self._thread.start()
+    
+    def write(self, text):
+        self._queue.put(text)
+    
+    def close(self):
+        self._queue.put(None)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _run(self):
+        try:
+            with open(self.path, 'w') as f:
+                while True:
+                    text = self._queue.get()
+                    if text is None:
+                        return
+                    f.write(text)
+                    if self._queue.empty():
+                        f.flush()
+        except OSError as e:
+            print(f"Error writing build log {self.path}: {e}")
+
+def count_published_blogs(blog_dir):
+    """Number of published posts in a site's blog directory"""
+    return len(list(blog_dir.glob('*.md'))) if blog_dir.exists() else 0
+
+async def terminate_process_group(process, grace=TERMINATE_GRACE):
+    """SIGTERM a process started with ``start_new_session`` and all its
+    children, then SIGKILL the group if it is still alive after ``grace``"""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+async def build_docusaurus_site(target=None, on_output=None, cache_dir=None, out_dir=None):
+    """Build Docusaurus site only for published blogs
     
-    # Path to your Docusaurus project
-    docu_path = Path('/mnt/NewVolume/git/Doc/Docs-QT-PyQt-PySide-Custom-Widgets')
+    ``on_output(stream, line)`` is awaited for every line npm prints.
+    ``cache_dir`` is exposed to the build as CACHE_DIR, and ``out_dir``
+    replaces the site's ``build/`` output directory. Sites with a
+    SITEMAP_SCRIPT get it run on the output once the build succeeds; if it
+    fails the build still succeeds, with the reason in ``sitemap_error``.
+    Cancelling the call kills the whole process tree of the running step.
+    """
+    target = target or load_build_targets()[0]
+    docu_path = target.path
+    loop = asyncio.get_running_loop()
     
-    # Create build logs directory
-    logs_dir = Path(__file__).parent / 'build_logs'
-    logs_dir.mkdir(exist_ok=True)
+    # Create build logs directory; disk work stays off the event loop
+    logs_dir = LOGS_DIR
+    await loop.run_in_executor(None, functools.partial(logs_dir.mkdir, exist_ok=True))
     
-    log_file = logs_dir / f'build_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
+    log_file = logs_dir / f'build_{target.name}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
     
     # Check if there are any published blogs
-    blog_dir = docu_path / 'blog'
-    blog_count = len(list(blog_dir.glob('*.md'))) if blog_dir.exists() else 0
+    blog_count = await loop.run_in_executor(None, count_published_blogs, docu_path / 'blog')
     
-    with open(log_file, 'w') as f:
+    with BuildLog(log_file) as f:
         f.write(f"Build started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Target: {target.name} ({docu_path}, locale: {target.locale or 'all'})\n")
         f.write(f"Published blogs found: {blog_count}\n")
         
         if blog_count == 0:
@@ -33,45 +144,114 @@ def build_docusaurus_site():
         f.write(f"Building Docusaurus site with {blog_count} published blogs...\n")
         
         try:
-            # Change to Docusaurus directory
-            os.chdir(docu_path)
-            
             # Run Docusaurus build
             env = os.environ.copy()
             env['PATH'] = '/usr/local/bin:/usr/bin:/home/spinn/.nvm/versions/node/v18.20.2/bin:' + env['PATH']
-
-            result = subprocess.run(
-                ['npm', 'run', 'build'],
-                capture_output=True,
-                text=True,
-                timeout=300,
-                env=env
-            )
-
+            if cache_dir:
+                env['CACHE_DIR'] = str(cache_dir)
+            
+            # Stream output line by line to the log file and the caller
+            output_tail = deque(maxlen=50)
+            deadline = loop.time() + BUILD_TIMEOUT
+            
+            async def emit(name, line):
+                f.write(line + '\n')
+                output_tail.append(line)
+                if on_output:
+                    await on_output(name, line)
+            
+            async def run_step(command):
+                # Each step runs in its own process group so that a timeout or
+                # a cancellation kills node and every worker it spawned
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    cwd=docu_path,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    env=env,
+                    limit=1024 * 1024,  # webpack can print very long lines
+                    start_new_session=True
+                )
+                
+                async def read_stream(stream, name):
+                    while True:
+                        raw = await stream.readline()
+                        if not raw:
+                            break
+                        await emit(name, raw.decode('utf-8', errors='replace').rstrip('\n'))
+                
+                readers = asyncio.gather(
+                    read_stream(process.stdout, 'stdout'),
+                    read_stream(process.stderr, 'stderr')
+                )
+                try:
+                    remaining = deadline - loop.time()
+                    await asyncio.wait_for(process.wait(), timeout=max(remaining, 0))
+                except (asyncio.CancelledError, asyncio.TimeoutError):
+                    # Take the whole tree down; its pipes close with it
+                    await asyncio.shield(terminate_process_group(process))
+                    await readers
+                    raise
+                await readers
+                return process.returncode
+            
+            options = []
+            if out_dir:
+                options += ['--out-dir', str(out_dir)]
+            if target.locale:
+                options += ['--locale', target.locale]
+            returncode = await run_step(['npm', 'run', 'build'] + (['--'] + options if options else []))
+            
+            sitemap_error = None
+            if returncode == 0 and await loop.run_in_executor(None, (docu_path / SITEMAP_SCRIPT).exists):
+                # Non-default locales are written to a subdirectory of the output
+                sitemap_dir = Path(out_dir) if out_dir else docu_path / 'build'
+                locale_sitemap = sitemap_dir / (target.locale or '') / 'sitemap.xml'
+                if target.locale and await loop.run_in_executor(None, locale_sitemap.exists):
+                    sitemap_dir = sitemap_dir / target.locale
+                command = ['node', SITEMAP_SCRIPT, str(sitemap_dir)]
+                # Echoed like npm does, which also starts the sitemap phase of the profile
+                await emit('stdout', f"> {' '.join(command)}")
+                # The site itself is built by now, so a failure here is only reported
+                try:
+                    sitemap_returncode = await run_step(command)
+                    if sitemap_returncode != 0:
+                        sitemap_error = f'{SITEMAP_SCRIPT} exited with code {sitemap_returncode}'
+                except asyncio.TimeoutError:
+                    sitemap_error = f'{SITEMAP_SCRIPT} timed out'
+                except OSError as e:
+                    sitemap_error = f'{SITEMAP_SCRIPT} could not be run: {e}'
+                if sitemap_error:
+                    f.write(f"⚠️ Sitemaps not generated: {sitemap_error}\n")
             
             f.write("Build process completed\n")
-            f.write(f"Return code: {result.returncode}\n")
+            f.write(f"Return code: {returncode}\n")
             
-            if result.returncode == 0:
+            if returncode == 0:
                 f.write("✅ Docusaurus build successful!\n")
-                return {
+                result = {
                     'status': 'success', 
                     'message': f'Built {blog_count} blogs successfully',
                     'log_file': str(log_file)
                 }
+                if sitemap_error:
+                    result['message'] += ', without sitemaps'
+                    result['sitemap_error'] = sitemap_error
+                return result
             else:
                 f.write("❌ Docusaurus build failed!\n")
-                f.write("STDERR:\n" + result.stderr + "\n")
-                f.write("STDOUT:\n" + result.stdout + "\n")
                 return {
                     'status': 'error', 
                     'message': 'Build process failed',
                     'log_file': str(log_file),
-                    'error': result.stderr
+                    'error': '\n'.join(output_tail)
                 }
                 
-        except subprocess.TimeoutExpired:
-            f.write("❌ Build timed out after 5 minutes\n")
+        except asyncio.CancelledError:
+            f.write("❌ Build cancelled\n")
+            raise
+        except asyncio.TimeoutError:
+            f.write(f"❌ Build timed out after {BUILD_TIMEOUT} seconds\n")
             return {
                 'status': 'error', 
                 'message': 'Build timed out',
@@ -85,6 +265,25 @@ def build_docusaurus_site():
                 'log_file': str(log_file)
             }
 
+async def _main(name=None):
+    """Build one target, echoing npm output; SIGTERM cancels the build"""
+    targets = {t.name: t for t in load_build_targets()}
+    name = name or next(iter(targets))
+    if name not in targets:
+        return {'status': 'error', 'message': f'Unknown build target: {name}'}
+    
+    async def echo(stream, line):
+        print(line, file=sys.stderr if stream == 'stderr' else sys.stdout, flush=True)
+    
+    build = asyncio.ensure_future(build_docusaurus_site(targets[name], on_output=echo))
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, build.cancel)
+    try:
+        return await build
+    except asyncio.CancelledError:
+        return {'status': 'cancelled', 'message': 'Build cancelled'}
+
 if __name__ == "__main__":
-    result = build_docusaurus_site()
-    print(json.dumps(result))
\ No newline at end of file
+    # Optional argument: name of the BUILD_TARGETS entry to build
+    result = asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else None))
+    # The result is always the last stdout line, after the streamed build output
+    print(json.dumps(result))
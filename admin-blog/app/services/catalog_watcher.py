@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional, fall back to polling
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+
+class _CatalogEventHandler(FileSystemEventHandler):
+    """Forward watchdog file events that change a post to the catalog watcher"""
+
+    # watchdog >= 3 also reports opened and closed_no_write on inotify, which
+    # every plain read of a post (e.g. by a Docusaurus build) would trigger
+    CHANGE_EVENTS = frozenset(('created', 'modified', 'moved', 'deleted'))
+
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in self.CHANGE_EVENTS:
+            return
+        paths = [event.src_path]
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            paths.append(dest_path)
+        self.watcher.touch(*paths)
+
+
+class CatalogWatcher:
+    """Keep a PostIndex hot from filesystem events.
+
+    Uses inotify (through watchdog) when available and falls back to
+    re-stat polling of the indexed directories otherwise.
+    """
+
+    def __init__(self, index, poll_interval=5.0):
+        self.index = index
+        self.poll_interval = poll_interval
+        self.mode = 'stopped'
+        self.event_count = 0
+        self.last_refresh = None
+        self.last_refresh_latency = None
+        self._observer = None
+        self._poll_thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self.mode != 'stopped'
+
+    def start(self):
+        """Load the catalog and start watching for changes"""
+        if self.running:
+            return
+
+        self._stop.clear()
+        self._timed(self.index.refresh)
+
+        if self._start_observer():
+            self.mode = 'inotify'
+        else:
+            self._poll_thread = threading.Thread(target=self._poll, daemon=True)
+            self._poll_thread.start()
+            self.mode = 'polling'
+
+        logger.info(f"Catalog watcher started in {self.mode} mode ({len(self.index)} posts)")
+
+    def stop(self):
+        """Stop watching; readers fall back to refreshing on demand"""
+        self._stop.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._poll_thread:
+            self._poll_thread.join(timeout=self.poll_interval + 1)
+            self._poll_thread = None
+        self.mode = 'stopped'
+
+    def touch(self, *paths):
+        """Apply an incremental update for the given paths"""
+        def update():
+            for path in paths:
+                draft = self.index.draft_for(path)
+                if draft is None or not self.index.accepts(path):
+                    self.index.discard(path)
+                else:
+                    self.index.lookup_path(path, draft)
+
+        self.event_count += 1
+        self._timed(update)
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'event_count': self.event_count,
+            'index_size': len(self.index),
+            'last_refresh': self.last_refresh,
+            'last_refresh_latency_ms': (
+                round(self.last_refresh_latency * 1000, 3)
+                if self.last_refresh_latency is not None else None
+            ),
+        }
+
+    def _start_observer(self):
+        if Observer is None:
+            return False
+
+        try:
+            observer = Observer()
+            handler = _CatalogEventHandler(self)
+            for directory, _ in self.index.directories:
+                observer.schedule(handler, str(directory), recursive=False)
+            observer.daemon = True
+            observer.start()
+        except Exception as e:
+            logger.warning(f"inotify watcher unavailable, falling back to polling: {e}")
+            return False
+
+        self._observer = observer
+        return True
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                changes = self._timed(self.index.refresh)
+                self.event_count += changes
+            except Exception as e:
+                logger.error(f"Catalog poll failed: {e}", exc_info=True)
+
+    def _timed(self, func):
+        started = time.perf_counter()
+        result = func()
+        self.last_refresh_latency = time.perf_counter() - started
+        self.last_refresh = datetime.now().isoformat()
+        return result
@@ -0,0 +1,20 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on concurrent blocking disk operations issued by the app
+MAX_IO_WORKERS = int(os.getenv('BLOG_IO_WORKERS', '4'))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_IO_WORKERS, thread_name_prefix='blog-io')
+
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking filesystem call on the bounded I/O pool.
+
+    Calls beyond ``MAX_IO_WORKERS`` queue in the pool instead of blocking
+    the event loop that serves HTTP and Socket.IO.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
@@ -0,0 +1,329 @@
+import os
+import sys
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+import yaml
+
+
+def parse_front_matter(content):
+    """Parse YAML front matter from markdown content"""
+    lines = content.split('\n')
+    if lines and lines[0] == '---':
+        front_matter_lines = []
+        for line in lines[1:]:
+            if line == '---':
+                break
+            front_matter_lines.append(line)
+        try:
+            front_matter = yaml.safe_load('\n'.join(front_matter_lines)) or {}
+        except yaml.YAMLError:
+            front_matter = {}
+        body = '\n'.join(lines[len(front_matter_lines) + 2:])
+        return front_matter, body
+    return {}, content
+
+
+def generate_blog_content(front_matter, body):
+    """Generate markdown content with YAML front matter"""
+    yaml_content = yaml.dump(front_matter, default_flow_style=False, allow_unicode=True)
+    return f"---\n{yaml_content}---\n\n{body}"
+
+
+def read_front_matter(file_path):
+    """Parse only the YAML front matter block at the head of a post file.
+
+    Reading stops at the closing ``---`` so the body is never loaded.
+    """
+    with open(file_path, encoding='utf-8') as f:
+        if f.readline().rstrip('\n') != '---':
+            return {}
+        front_matter_lines = []
+        for line in f:
+            line = line.rstrip('\n')
+            if line == '---':
+                break
+            front_matter_lines.append(line)
+    try:
+        return yaml.safe_load('\n'.join(front_matter_lines)) or {}
+    except yaml.YAMLError:
+        return {}
+
+
+def read_post_body(file_path):
+    """Load the markdown body of a post file, without its front matter"""
+    content = Path(file_path).read_text(encoding='utf-8')
+    return parse_front_matter(content)[1]
+
+
+_shared_values = {}
+
+
+def _shared(values):
+    """Return an interned tuple of front matter values.
+
+    Strings are interned and identical tuples are shared, so thousands of
+    posts with the same tags or authors point at the same objects.
+    """
+    if not values:
+        return ()
+    if isinstance(values, str):
+        values = [values]
+    values = tuple(sys.intern(v) if isinstance(v, str) else v for v in values)
+    try:
+        return _shared_values.setdefault(values, values)
+    except TypeError:
+        # Inline author objects are dicts and cannot be shared
+        return values
+
+
+class PostMeta:
+    """Compact listing record of a blog post, without its body"""
+
+    __slots__ = ('slug', 'filename', 'title', 'date', 'authors', 'draft', 'tags', 'file_path')
+
+    def __init__(self, slug, filename, title, date, authors, draft, tags, file_path):
+        self.slug = slug
+        self.filename = filename
+        self.title = title
+        self.date = date
+        self.authors = authors
+        self.draft = draft
+        self.tags = tags
+        self.file_path = file_path
+
+    @classmethod
+    def from_front_matter(cls, path, front_matter, draft):
+        """Build a record from a post file path and its parsed front matter"""
+        path = Path(path)
+        date = front_matter.get('date', '')
+        return cls(
+            slug=str(front_matter.get('slug') or path.stem),
+            filename=path.name,
+            title=front_matter.get('title', 'Untitled'),
+            date=str(date) if date else '',
+            authors=_shared(front_matter.get('authors')),
+            draft=draft,
+            tags=_shared(front_matter.get('tags')),
+            file_path=str(path)
+        )
+
+    @property
+    def stem(self):
+        """Filename without extension; unique within a directory, so URLs use it"""
+        return self.filename.rsplit('.', 1)[0]
+
+    def __repr__(self):
+        return f"<{type(self).__name__}(slug='{self.slug}', draft={self.draft})>"
+
+
+class Post(PostMeta):
+    """A post record together with its markdown body"""
+
+    __slots__ = ('content',)
+
+    def __init__(self, content, **fields):
+        super().__init__(**fields)
+        self.content = content
+
+    @classmethod
+    def from_meta(cls, meta, content):
+        return cls(content, **{name: getattr(meta, name) for name in PostMeta.__slots__})
+
+
+def load_post(file_path, draft):
+    """Build the listing record of a post file from its front matter only"""
+    return PostMeta.from_front_matter(file_path, read_front_matter(file_path), draft)
+
+
+class PostIndex:
+    """Process-wide index of blog post metadata keyed by file path.
+
+    Every entry keeps the parsed post together with the ``(mtime_ns, size)``
+    signature of the file it came from, so a refresh only has to stat the
+    directories and re-parse the files whose signature changed.
+    """
+
+    def __init__(self, blog_dir, draft_dir, suffixes=('.md', '.mdx')):
+        self.directories = ((Path(blog_dir), False), (Path(draft_dir), True))
+        self.suffixes = tuple(suffixes)
+        self._entries = {}
+        self._by_name = defaultdict(list)   # filename stem and filename
+        self._by_alias = defaultdict(list)  # front matter slug
+        self._by_tag = defaultdict(set)
+        self._sorted = None
+        self._lock = threading.RLock()
+
+    def draft_for(self, file_path):
+        """Return the draft flag for a path inside an indexed directory, else None"""
+        parent = Path(file_path).parent
+        for directory, draft in self.directories:
+            if parent == directory:
+                return draft
+        return None
+
+    def accepts(self, file_path):
+        """Whether ``file_path`` names a post file (temp and hidden files are not)"""
+        name = Path(file_path).name
+        return name.endswith(self.suffixes) and not name.startswith('.')
+
+    # -----------------------------
+    # Maintenance
+    # -----------------------------
+    def refresh(self):
+        """Re-stat both directories and re-parse only changed files.
+
+        Returns the number of entries that were added, updated or removed.
+        """
+        with self._lock:
+            return self._refresh_all()
+
+    def _refresh_all(self):
+        changes = 0
+        seen = set()
+
+        for directory, draft in self.directories:
+            if not directory.exists():
+                directory.mkdir(parents=True, exist_ok=True)
+
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not self.accepts(entry.name) or not entry.is_file():
+                        continue
+                    seen.add(entry.path)
+                    if self._refresh_entry(entry.path, entry.stat(), draft):
+                        changes += 1
+
+        for path in [p for p in self._entries if p not in seen]:
+            self._remove(path)
+            changes += 1
+
+        return changes
+
+    def lookup_path(self, file_path, draft):
+        """Return the post stored at ``file_path``, re-parsing it if it changed"""
+        path = str(file_path)
+        with self._lock:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if path in self._entries:
+                    self._remove(path)
+                return None
+
+            self._refresh_entry(path, stat, draft)
+            entry = self._entries.get(path)
+            return entry[1] if entry else None
+
+    def discard(self, file_path):
+        """Drop ``file_path`` from the index, returning True if it was indexed"""
+        with self._lock:
+            if str(file_path) not in self._entries:
+                return False
+            self._remove(str(file_path))
+            return True
+
+    def _refresh_entry(self, path, stat, draft):
+        signature = (stat.st_mtime_ns, stat.st_size)
+        current = self._entries.get(path)
+        if current and current[0] == signature and current[1].draft == draft:
+            return False
+
+        if current:
+            self._remove(path)
+        try:
+            post = load_post(Path(path), draft)
+            self._link(post)
+        except Exception as e:
+            print(f"Error reading {'draft ' if draft else ''}{path}: {e}")
+            return current is not None
+
+        self._entries[path] = (signature, post)
+        self._sorted = None
+        return True
+
+    def _remove(self, path):
+        _, post = self._entries.pop(path)
+        self._unlink(post)
+        self._sorted = None
+
+    @staticmethod
+    def _name_keys(post):
+        # Filename stem (date prefix included) and full filename
+        return {post.stem, post.filename}
+
+    @staticmethod
+    def _tag_keys(post):
+        # Docusaurus also accepts inline tag objects ({label, permalink})
+        keys = set()
+        for tag in post.tags:
+            if isinstance(tag, dict):
+                tag = tag.get('label')
+            if isinstance(tag, (str, int, float)):
+                keys.add(str(tag))
+        return keys
+
+    def _link(self, post):
+        tags = self._tag_keys(post)
+        for key in self._name_keys(post):
+            self._by_name[key].append(post)
+        self._by_alias[post.slug].append(post)
+        for tag in tags:
+            self._by_tag[tag].add(post.file_path)
+
+    def _unlink(self, post):
+        for index, keys in ((self._by_name, self._name_keys(post)), (self._by_alias, (post.slug,))):
+            for key in keys:
+                posts = index.get(key)
+                if posts is not None:
+                    posts[:] = [p for p in posts if p is not post]
+                    if not posts:
+                        del index[key]
+        for tag in self._tag_keys(post):
+            paths = self._by_tag.get(tag)
+            if paths is not None:
+                paths.discard(post.file_path)
+                if not paths:
+                    del self._by_tag[tag]
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def all(self):
+        """All indexed posts, newest first"""
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(
+                    (post for _, post in self._entries.values()),
+                    key=lambda x: x.date,
+                    reverse=True
+                )
+            return self._sorted
+
+    def by_slug(self, slug, draft=None):
+        """Resolve a filename stem, filename or front matter slug to a post.
+
+        Filenames are tried before front matter slugs, which several posts
+        may share. A key matching more than one post (within ``draft``'s
+        directory, if given) resolves to None rather than to a guess, so an
+        edit or delete can never hit the wrong post.
+        """
+        for index in (self._by_name, self._by_alias):
+            posts = [p for p in index.get(slug, ()) if draft is None or p.draft == draft]
+            if posts:
+                return posts[0] if len(posts) == 1 else None
+        return None
+
+    def by_tag(self, tag):
+        paths = self._by_tag.get(str(tag), ())
+        return [post for post in self.all() if post.file_path in paths]
+
+    def published(self):
+        return [post for post in self.all() if not post.draft]
+
+    def drafts(self):
+        return [post for post in self.all() if post.draft]
+
+    def __len__(self):
+        return len(self._entries)
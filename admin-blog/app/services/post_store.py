@@ -0,0 +1,111 @@
+import errno
+import os
+import shutil
+from pathlib import Path
+from uuid import uuid4
+
+from .post_index import generate_blog_content, parse_front_matter, read_front_matter
+
+
+def _fsync_dir(directory):
+    """Persist a rename or unlink by syncing the containing directory"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _temp_path(path):
+    # Dot-prefixed and not ending in .md/.mdx, so neither the catalog nor
+    # the Docusaurus build ever picks up a half-written file
+    return path.parent / f".{path.name}.{uuid4().hex}.tmp"
+
+
+def atomic_write(path, content):
+    """Write ``content`` to ``path`` so readers see either the old or new file.
+
+    The data goes to a temp file in the same directory, is fsynced and then
+    moved into place with ``os.replace``.
+    """
+    path = Path(path)
+    temp_path = _temp_path(path)
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)
+
+
+def move(src, dst):
+    """Move a post file with a single rename.
+
+    Falls back to an atomic copy followed by unlinking the source when the
+    two directories live on different filesystems.
+    """
+    src, dst = Path(src), Path(dst)
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        temp_path = _temp_path(dst)
+        try:
+            shutil.copy2(src, temp_path)
+            with open(temp_path, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(temp_path, dst)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        src.unlink()
+        _fsync_dir(src.parent)
+    else:
+        if src.parent != dst.parent:
+            _fsync_dir(src.parent)
+    _fsync_dir(dst.parent)
+
+
+def strip_draft_flag(path):
+    """Drop a legacy ``draft`` front matter key in place, if present.
+
+    Whether a post is a draft is decided by its directory, so only files
+    written before that rule carry the key. Returns True if it rewrote.
+    """
+    path = Path(path)
+    if 'draft' not in read_front_matter(path):
+        return False
+
+    front_matter, body = parse_front_matter(path.read_text(encoding='utf-8'))
+    del front_matter['draft']
+    atomic_write(path, generate_blog_content(front_matter, body))
+    return True
+
+
+def save(path, content, replaces=None):
+    """Atomically write a post, then remove the file it replaces.
+
+    The new file is in place before the old one goes away, so a crash in
+    between can leave a duplicate but never loses the post.
+    """
+    path = Path(path)
+    atomic_write(path, content)
+    if replaces is not None and Path(replaces) != path:
+        Path(replaces).unlink(missing_ok=True)
+        _fsync_dir(Path(replaces).parent)
+
+
+def delete(path):
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    _fsync_dir(path.parent)
@@ -1,19 +1,66 @@
+import asyncio
 import bcrypt
+import os
 import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from itsdangerous import URLSafeTimedSerializer
 from quart import current_app
 
+# bcrypt work factor for new hashes; each step doubles the cost. Existing
+# hashes keep the factor they were created with.
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+# Threads hashing passwords; bcrypt releases the GIL while it works
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+
+# Hash operations allowed to wait for a worker before new ones are refused
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '32'))
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+_hash_pending = 0
+_hash_pending_lock = threading.Lock()
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes are already queued."""
+
 # Password Utilities
 def hash_password(password: str) -> str:
     """Securely hash a password using bcrypt."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     """Verify a password against its hash."""
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def _hash_finished(future):
+    global _hash_pending
+    with _hash_pending_lock:
+        _hash_pending -= 1
+
+async def _run_hash(func, *args):
+    """Run a bcrypt call on the hashing pool, refusing it when the queue is full."""
+    global _hash_pending
+    with _hash_pending_lock:
+        if _hash_pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE:
+            raise PasswordHasherBusy(f'{_hash_pending} password hashes already pending')
+        _hash_pending += 1
+    future = _hash_executor.submit(func, *args)
+    # Counted until the pool is done with it: a request that goes away while
+    # bcrypt runs leaves the worker busy, and a queued one is cancelled
+    future.add_done_callback(_hash_finished)
+    return await asyncio.wrap_future(future)
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await _run_hash(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verify a password without blocking the event loop."""
+    return await _run_hash(verify_password, password, hashed)
+
 # CSRF Protection
 def generate_csrf_token() -> str:
     """Generate a cryptographically secure CSRF token."""
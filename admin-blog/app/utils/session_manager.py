@@ -1,77 +1,460 @@
 import asyncio
+import heapq
+import json
+import os
+import time
 from datetime import datetime
 from uuid import uuid4
 from collections import defaultdict
 import logging
 from quart import session
+from ..config import REDIS_URL, STATE_BACKEND
 
 logger = logging.getLogger(__name__)
 
-active_sessions = defaultdict(dict)
+# Seconds without activity after which a session expires
+SESSION_TTL = float(os.getenv('SESSION_TTL_SECONDS', '3600'))
+
+# Seconds between background passes evicting expired sessions
+SESSION_SWEEP_INTERVAL = float(os.getenv('SESSION_SWEEP_SECONDS', '60'))
+
+class SessionRegistry:
+    """Active HTTP and Socket.IO sessions per user.
+
+    A session expires ``ttl`` seconds after its last activity. Expirations
+    sit in a min-heap: every activity pushes a new deadline and superseded
+    entries are skipped when they surface, so evicting a session costs
+    O(log n) instead of a sweep over all of them. Connected sockets are
+    indexed by sid. The methods are coroutines so that a shared backend
+    can offer the same interface.
+    """
+
+    def __init__(self, ttl=SESSION_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._sessions = defaultdict(dict)  # user_id -> session_id -> data
+        self._deadlines = {}                # (user_id, session_id) -> expiry
+        self._expiry = []                   # heap of (expiry, user_id, session_id)
+        self._sockets = {}                  # sid -> (user_id, session_id)
+        self.evictions = 0
+        self.stale_entries_skipped = 0
+        self.last_eviction = None
+
+    async def touch(self, user_id, session_id):
+        """Record activity on a session, creating it if needed"""
+        user_id = str(user_id)
+        data = self._sessions[user_id].get(session_id)
+        if data is None:
+            # Created without socket_id; it is set on WebSocket connect
+            data = self._sessions[user_id][session_id] = {
+                'last_active': datetime.now(),
+                'status': 'active',
+                'session_id': session_id,
+                'socket_id': None
+            }
+        else:
+            data['last_active'] = datetime.now()
+        self._schedule(user_id, session_id)
+        self._evict_expired()
+        return data
+
+    async def attach_socket(self, user_id, session_id, sid):
+        """Register a WebSocket connection as the socket of a session"""
+        user_id = str(user_id)
+        previous = self._sessions[user_id].get(session_id)
+        if previous and previous.get('socket_id'):
+            # A newer socket takes the session over from an older one
+            self._unindex_socket(previous['socket_id'], user_id, session_id)
+
+        self._sessions[user_id][session_id] = {
+            'last_active': datetime.now(),
+            'status': 'active',
+            'socket_id': sid,
+            'session_id': session_id
+        }
+        self._sockets[sid] = (user_id, session_id)
+        self._schedule(user_id, session_id)
+        self._evict_expired()
+
+    async def detach_socket(self, sid):
+        """Forget a disconnected socket.
+
+        Returns its ``(user_id, session_id)``, or None when the session
+        is gone or has moved to another socket.
+        """
+        entry = self._sockets.pop(sid, None)
+        if entry is None:
+            return None
+        user_id, session_id = entry
+        data = self._sessions.get(user_id, {}).get(session_id)
+        if not data or data.get('socket_id') != sid:
+            return None
+
+        # Only remove if no HTTP activity expected
+        if data.get('http_active', False):
+            data['socket_id'] = None
+        else:
+            self._remove(user_id, session_id)
+        return entry
+
+    async def find_socket(self, sid):
+        """``(user_id, session_id)`` of a connected socket, or None"""
+        entry = self._sockets.get(sid)
+        if entry and entry[1] in self._sessions.get(entry[0], {}):
+            return entry
+        return None
+
+    async def user_sessions(self, user_id):
+        """Sessions of a user by session_id"""
+        return dict(self._sessions.get(str(user_id), {}))
+
+    async def user_sockets(self, user_id):
+        """Socket ids of a user's connected sessions by session_id"""
+        return {
+            session_id: data['socket_id']
+            for session_id, data in self._sessions.get(str(user_id), {}).items()
+            if data.get('socket_id')
+        }
+
+    async def validate(self, user_id):
+        """Drop the expired sessions of one user"""
+        user_id = str(user_id)
+        now = self._clock()
+        for session_id in list(self._sessions.get(user_id, {})):
+            if self._deadlines.get((user_id, session_id), now) <= now:
+                self._remove(user_id, session_id)
+                self.evictions += 1
+
+    async def evict_expired(self):
+        """Evict every session past its deadline; returns how many"""
+        return self._evict_expired()
+
+    async def metrics(self):
+        """Size and eviction counters"""
+        return {
+            'users': len(self._sessions),
+            'sessions': len(self._deadlines),
+            'sockets': len(self._sockets),
+            'heap_size': len(self._expiry),
+            'evictions': self.evictions,
+            'stale_entries_skipped': self.stale_entries_skipped,
+            'last_eviction': self.last_eviction.isoformat() if self.last_eviction else None,
+            'ttl_seconds': self.ttl
+        }
+
+    def _schedule(self, user_id, session_id):
+        expires_at = self._clock() + self.ttl
+        self._deadlines[(user_id, session_id)] = expires_at
+        heapq.heappush(self._expiry, (expires_at, user_id, session_id))
+        self._compact()
+
+    def _compact(self):
+        # Superseded entries pile up with activity and removals; rebuild
+        # the heap from the live deadlines once they outnumber them
+        if len(self._expiry) > 2 * len(self._deadlines) + 64:
+            self._expiry = [(expires_at, *key) for key, expires_at in self._deadlines.items()]
+            heapq.heapify(self._expiry)
+
+    def _evict_expired(self):
+        now = self._clock()
+        evicted = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, user_id, session_id = heapq.heappop(self._expiry)
+            if self._deadlines.get((user_id, session_id)) != expires_at:
+                self.stale_entries_skipped += 1
+                continue
+            self._remove(user_id, session_id)
+            logger.info(f"Evicted stale session {session_id} for user {user_id}")
+            evicted += 1
+        if evicted:
+            self.evictions += evicted
+            self.last_eviction = datetime.now()
+        return evicted
+
+    def _remove(self, user_id, session_id):
+        sessions = self._sessions.get(user_id, {})
+        data = sessions.pop(session_id, None)
+        self._deadlines.pop((user_id, session_id), None)
+        if data and data.get('socket_id'):
+            self._unindex_socket(data['socket_id'], user_id, session_id)
+        # Remove user if no sessions left
+        if not sessions:
+            self._sessions.pop(user_id, None)
+        self._compact()
+
+    def _unindex_socket(self, sid, user_id, session_id):
+        if self._sockets.get(sid) == (user_id, session_id):
+            del self._sockets[sid]
+
+class RedisSessionRegistry:
+    """Session registry kept in Redis, shared by every worker and node.
+
+    Same interface as SessionRegistry. A user's sessions are JSON values in
+    the hash ``<prefix>:user:<id>``, their deadlines sit in the sorted set
+    ``<prefix>:expiry`` (scored by wall clock time, as workers share no
+    monotonic clock) and connected sockets in the hash ``<prefix>:sockets``.
+    A session is evicted by whichever worker removes it from the sorted set
+    first, so concurrent sweeps never evict it twice. ``client`` must
+    decode responses.
+    """
+
+    def __init__(self, url=REDIS_URL, ttl=SESSION_TTL, clock=time.time, client=None, prefix='sessions'):
+        if client is None:
+            from redis import asyncio as aioredis
+            client = aioredis.from_url(url, decode_responses=True)
+        self.redis = client
+        self.ttl = ttl
+        self._clock = clock
+        self._prefix = prefix
+        self._expiry_key = f'{prefix}:expiry'
+        self._sockets_key = f'{prefix}:sockets'
+        self._users_key = f'{prefix}:users'
+        # Counters are per worker
+        self.evictions = 0
+        self.last_eviction = None
+
+    async def touch(self, user_id, session_id):
+        """Record activity on a session, creating it if needed"""
+        user_id = str(user_id)
+
+        def refresh(data):
+            if data is None:
+                # Created without socket_id; it is set on WebSocket connect
+                return {
+                    'last_active': datetime.now(),
+                    'status': 'active',
+                    'session_id': session_id,
+                    'socket_id': None
+                }
+            data['last_active'] = datetime.now()
+            return data
+
+        data = await self._update(user_id, session_id, refresh)
+        await self._evict_expired()
+        return data
+
+    async def attach_socket(self, user_id, session_id, sid):
+        """Register a WebSocket connection as the socket of a session"""
+        user_id = str(user_id)
+        previous = await self._load(user_id, session_id)
+        if previous and previous.get('socket_id'):
+            # A newer socket takes the session over from an older one
+            await self._unindex_socket(previous['socket_id'], user_id, session_id)
+
+        data = {
+            'last_active': datetime.now(),
+            'status': 'active',
+            'socket_id': sid,
+            'session_id': session_id
+        }
+        await self._store(user_id, session_id, data, sid=sid)
+        await self._evict_expired()
+
+    async def detach_socket(self, sid):
+        """Forget a disconnected socket.
+
+        Returns its ``(user_id, session_id)``, or None when the session
+        is gone or has moved to another socket.
+        """
+        member = await self.redis.hget(self._sockets_key, sid)
+        if member is None:
+            return None
+        await self.redis.hdel(self._sockets_key, sid)
+        user_id, session_id = json.loads(member)
+        data = await self._load(user_id, session_id)
+        if not data or data.get('socket_id') != sid:
+            return None
+
+        # Only remove if no HTTP activity expected
+        if data.get('http_active', False):
+            def release(data):
+                if data and data.get('socket_id') == sid:
+                    data['socket_id'] = None
+                    return data
+                return None
+
+            await self._update(user_id, session_id, release, schedule=False)
+        else:
+            await self._remove(user_id, session_id)
+        return user_id, session_id
+
+    async def find_socket(self, sid):
+        """``(user_id, session_id)`` of a connected socket, or None"""
+        member = await self.redis.hget(self._sockets_key, sid)
+        if member is None:
+            return None
+        user_id, session_id = json.loads(member)
+        if await self.redis.hexists(self._user_key(user_id), session_id):
+            return user_id, session_id
+        return None
+
+    async def user_sessions(self, user_id):
+        """Sessions of a user by session_id"""
+        raw = await self.redis.hgetall(self._user_key(str(user_id)))
+        return {session_id: self._decode(value) for session_id, value in raw.items()}
+
+    async def user_sockets(self, user_id):
+        """Socket ids of a user's connected sessions by session_id"""
+        return {
+            session_id: data['socket_id']
+            for session_id, data in (await self.user_sessions(user_id)).items()
+            if data.get('socket_id')
+        }
+
+    async def validate(self, user_id):
+        """Drop the expired sessions of one user"""
+        user_id = str(user_id)
+        now = self._clock()
+        for session_id in await self.redis.hkeys(self._user_key(user_id)):
+            member = self._member(user_id, session_id)
+            deadline = await self.redis.zscore(self._expiry_key, member)
+            if deadline is not None and deadline > now:
+                continue
+            if deadline is None or await self.redis.zrem(self._expiry_key, member):
+                await self._remove(user_id, session_id)
+                self.evictions += 1
+
+    async def evict_expired(self):
+        """Evict every session past its deadline; returns how many"""
+        return await self._evict_expired()
+
+    async def metrics(self):
+        """Size and eviction counters"""
+        return {
+            'backend': 'redis',
+            'users': await self.redis.scard(self._users_key),
+            'sessions': await self.redis.zcard(self._expiry_key),
+            'sockets': await self.redis.hlen(self._sockets_key),
+            'evictions': self.evictions,
+            'last_eviction': self.last_eviction.isoformat() if self.last_eviction else None,
+            'ttl_seconds': self.ttl
+        }
+
+    def _user_key(self, user_id):
+        return f'{self._prefix}:user:{user_id}'
+
+    @staticmethod
+    def _member(user_id, session_id):
+        return json.dumps([user_id, session_id])
+
+    @staticmethod
+    def _encode(data):
+        return json.dumps(dict(data, last_active=data['last_active'].isoformat()))
+
+    @staticmethod
+    def _decode(raw):
+        data = json.loads(raw)
+        data['last_active'] = datetime.fromisoformat(data['last_active'])
+        return data
+
+    async def _load(self, user_id, session_id):
+        raw = await self.redis.hget(self._user_key(user_id), session_id)
+        return self._decode(raw) if raw else None
+
+    async def _store(self, user_id, session_id, data, sid=None):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_store(pipe, user_id, session_id, data)
+            if sid:
+                pipe.hset(self._sockets_key, sid, self._member(user_id, session_id))
+            await pipe.execute()
+
+    async def _update(self, user_id, session_id, change, schedule=True):
+        """Read-modify-write one session as a transaction.
+
+        The user's hash is WATCHed, so when another worker writes it in
+        between (say, attaching a socket) the change is re-applied to the
+        new data instead of overwriting it. ``change`` gets the current
+        data or None and returns the data to store, or None to store nothing.
+        """
+        user_key = self._user_key(user_id)
+
+        async def apply(pipe):
+            raw = await pipe.hget(user_key, session_id)
+            data = change(self._decode(raw) if raw else None)
+            pipe.multi()
+            if data is not None:
+                self._queue_store(pipe, user_id, session_id, data, schedule)
+            return data
+
+        return await self.redis.transaction(apply, user_key, value_from_callable=True)
+
+    def _queue_store(self, pipe, user_id, session_id, data, schedule=True):
+        pipe.hset(self._user_key(user_id), session_id, self._encode(data))
+        if schedule:
+            pipe.zadd(self._expiry_key, {self._member(user_id, session_id): self._clock() + self.ttl})
+        pipe.sadd(self._users_key, user_id)
+
+    async def _evict_expired(self):
+        members = await self.redis.zrangebyscore(self._expiry_key, '-inf', self._clock())
+        evicted = 0
+        for member in members:
+            # Another worker may be evicting the same session
+            if not await self.redis.zrem(self._expiry_key, member):
+                continue
+            user_id, session_id = json.loads(member)
+            await self._remove(user_id, session_id)
+            logger.info(f"Evicted stale session {session_id} for user {user_id}")
+            evicted += 1
+        if evicted:
+            self.evictions += evicted
+            self.last_eviction = datetime.now()
+        return evicted
+
+    async def _remove(self, user_id, session_id):
+        user_key = self._user_key(user_id)
+        data = await self._load(user_id, session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(user_key, session_id)
+            pipe.zrem(self._expiry_key, self._member(user_id, session_id))
+            await pipe.execute()
+        if data and data.get('socket_id'):
+            await self._unindex_socket(data['socket_id'], user_id, session_id)
+        # Remove user if no sessions left
+        if not await self.redis.hlen(user_key):
+            await self.redis.srem(self._users_key, user_id)
+
+    async def _unindex_socket(self, sid, user_id, session_id):
+        if await self.redis.hget(self._sockets_key, sid) == self._member(user_id, session_id):
+            await self.redis.hdel(self._sockets_key, sid)
+
+def create_session_registry(backend=STATE_BACKEND):
+    """Session registry for the configured state backend"""
+    if backend == 'redis':
+        return RedisSessionRegistry()
+    if backend != 'memory':
+        raise ValueError(f'Unknown state backend: {backend}')
+    return SessionRegistry()
+
+session_registry = create_session_registry()
 
 async def cleanup_stale_sessions():
-    """Periodically clean up inactive sessions"""
+    """Periodically evict expired sessions the request traffic did not reach"""
     while True:
         try:
-            now = datetime.now()
-            for user_id, sessions in list(active_sessions.items()):
-                for session_id, session_data in list(sessions.items()):
-                    if not isinstance(session_data, dict):
-                        del active_sessions[user_id][session_id]
-                        continue
-                        
-                    if (now - session_data['last_active']).total_seconds() > 3600:
-                        del active_sessions[user_id][session_id]
-                        logger.info(f"Cleaned up stale session {session_id} for user {user_id}")
-                        
-                # Remove user if no sessions left
-                if not active_sessions[user_id]:
-                    del active_sessions[user_id]
-                    
+            await session_registry.evict_expired()
         except Exception as e:
             logger.error(f"Error cleaning up sessions: {e}", exc_info=True)
-        await asyncio.sleep(3600)  # Run hourly
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
 
-def get_user_sessions(user_id):
+async def get_user_sessions(user_id):
     """Get all valid sessions for a user"""
-    validate_user_sessions(user_id)
-    return active_sessions.get(user_id, {})
+    await validate_user_sessions(user_id)
+    return await session_registry.user_sessions(user_id)
 
-def validate_user_sessions(user_id):
-    """Ensure clean session structure for a user"""
-    if user_id not in active_sessions:
-        return
-        
-    # Remove any invalid entries
-    to_delete = [k for k, v in active_sessions[user_id].items() 
-                if k == 'socket_id' or not isinstance(v, dict)]
-                
-    for key in to_delete:
-        logger.warning(f"Removing invalid session entry: {key}")
-        del active_sessions[user_id][key]
+async def validate_user_sessions(user_id):
+    """Ensure no expired session of a user is left behind"""
+    await session_registry.validate(user_id)
 
 async def track_http_session():
     """Track HTTP session and link with WebSocket if available"""
     if 'user_id' not in session:
         return
-        
+
     user_id = session['user_id']
-    
+
     # Ensure session ID exists
     if 'session_id' not in session:
         session['session_id'] = str(uuid4())
-        
-    session_id = session['session_id']
-    
+
     # Update or create session entry
-    if session_id in active_sessions.get(user_id, {}):
-        # Update existing session
-        active_sessions[user_id][session_id]['last_active'] = datetime.now()
-    else:
-        # Create new session without socket_id (will be added on WS connect)
-        active_sessions[user_id][session_id] = {
-            'last_active': datetime.now(),
-            'status': 'active',
-            'session_id': session_id,
-            'socket_id': None  # Will be set on WebSocket connection
-        }
\ No newline at end of file
+    await session_registry.touch(user_id, session['session_id'])
@@ -1,10 +1,95 @@
 # app/shared_state.py
-from asyncio import Lock
-from collections import defaultdict
+import asyncio
 import logging
+import time
+import weakref
+from contextlib import asynccontextmanager
 
 logger = logging.getLogger(__name__)
 
 
-user_locks = defaultdict(lambda: Lock())  # Per-user lock
+class _LockEntry:
+    __slots__ = ('lock', 'users', 'waiters')
 
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0    # holder plus waiters
+        self.waiters = 0
+
+
+class KeyedLocks:
+    """One asyncio lock per key, alive only while someone holds or awaits it.
+
+    Locks are created on first use and dropped once their last user leaves,
+    so the registry stays as large as the set of keys in use. asyncio locks
+    belong to the loop they are used on; each loop gets its own set, kept in
+    a weak mapping so that the locks of a loop discarded by the reloader or
+    a test go away with it.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._entries = weakref.WeakKeyDictionary()  # loop -> key -> _LockEntry
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.max_waiters = 0
+        self.evictions = 0
+
+    @asynccontextmanager
+    async def hold(self, key):
+        """Hold the lock of ``key`` for the body of an ``async with``"""
+        loop = asyncio.get_running_loop()
+        entries = self._entries.setdefault(loop, {})
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = _LockEntry()
+        entry.users += 1
+        try:
+            if entry.lock.locked():
+                await self._wait(entry)
+            else:
+                await entry.lock.acquire()
+            self.acquisitions += 1
+            try:
+                yield
+            finally:
+                entry.lock.release()
+        finally:
+            entry.users -= 1
+            if not entry.users and entries.get(key) is entry:
+                del entries[key]
+                self.evictions += 1
+
+    async def _wait(self, entry):
+        self.contended += 1
+        entry.waiters += 1
+        self.max_waiters = max(self.max_waiters, entry.waiters)
+        started = self._clock()
+        try:
+            await entry.lock.acquire()
+        finally:
+            entry.waiters -= 1
+            waited = self._clock() - started
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def metrics(self):
+        """Live keys, current waiters per key and contention counters"""
+        entries = [item for keyed in list(self._entries.values()) for item in keyed.items()]
+        return {
+            'loops': len(self._entries),
+            'keys': len(entries),
+            'waiters': {str(key): entry.waiters for key, entry in entries if entry.waiters},
+            'acquisitions': self.acquisitions,
+            'contended': self.contended,
+            'wait_seconds_total': round(self.wait_seconds, 6),
+            'wait_seconds_avg': round(self.wait_seconds / self.contended, 6) if self.contended else 0.0,
+            'max_wait_seconds': round(self.max_wait_seconds, 6),
+            'max_waiters': self.max_waiters,
+            'evictions': self.evictions
+        }
+
+
+user_locks = KeyedLocks()  # Per-user lock
@@ -1,9 +1,10 @@
-import asyncio
 from uuid import uuid4
 import logging
-from datetime import datetime
-from .status import get_user_status, format_status, notify_sessions
-from .session_manager import active_sessions, validate_user_sessions
+from .status import (
+    SITE_ROOM, notify_sessions, join_room, leave_room, status_publisher, user_room
+)
+from .session_manager import session_registry, validate_user_sessions
+from ..services.build_manager import BUILD_LOG_ROOM, BUILD_STATUS_ROOM, build_manager
 
 logger = logging.getLogger(__name__)
 
@@ -36,15 +37,12 @@ def register_socket_handlers(sio):
                 session_id = str(uuid4())
 
             # Ensure clean session structure
-            validate_user_sessions(user_id)
+            await validate_user_sessions(user_id)
 
             # Register WebSocket connection
-            active_sessions.setdefault(user_id, {})[session_id] = {
-                'last_active': datetime.now(),
-                'status': 'active',
-                'socket_id': sid,
-                'session_id': session_id
-            }
+            await session_registry.attach_socket(user_id, session_id, sid)
+            await join_room(sid, user_room(user_id))
+            await join_room(sid, SITE_ROOM)
 
             return True
             
@@ -54,29 +52,23 @@ def register_socket_handlers(sio):
 
     @sio.on('disconnect')
     async def disconnect(sid):
+        build_manager.remove_status_subscriber(sid)
+        status_publisher.forget(sid)
         try:
-            for user_id, sessions in list(active_sessions.items()):
-                for session_id, session_data in list(sessions.items()):
-                    if not isinstance(session_data, dict):
-                        continue
-                        
-                    if session_data.get('socket_id') == sid:
-                        # Only remove if no HTTP activity expected
-                        if not session_data.get('http_active', False):
-                            del active_sessions[user_id][session_id]
-                        else:
-                            # Just clear socket_id for HTTP sessions
-                            active_sessions[user_id][session_id]['socket_id'] = None
-                            
-                        await notify_sessions(user_id, 'session_update', {
-                            'type': 'disconnect',
-                            'session_id': session_id
-                        })
-                        
-                        # Remove user if no sessions left
-                        if not active_sessions[user_id]:
-                            del active_sessions[user_id]
-                        break
+            owner = await session_registry.find_socket(sid)
+            if owner:
+                await leave_room(sid, user_room(owner[0]))
+            await leave_room(sid, SITE_ROOM)
+            
+            entry = await session_registry.detach_socket(sid)
+            if entry is None:
+                return
+            user_id, session_id = entry
+                
+            await notify_sessions(user_id, 'session_update', {
+                'type': 'disconnect',
+                'session_id': session_id
+            })
         except Exception as e:
             logger.error(f"Disconnect error: {str(e)}", exc_info=True)
 
@@ -84,29 +76,50 @@ def register_socket_handlers(sio):
     async def handle_request_status_update(sid):
         try:
             # Find user_id for this socket
-            user_id = None
-            session_id = None
-            
-            for uid, sessions in active_sessions.items():
-                for sess_id, sess_data in sessions.items():
-                    if isinstance(sess_data, dict) and sess_data.get('socket_id') == sid:
-                        user_id = uid
-                        session_id = sess_id
-                        break
-                if user_id:
-                    break
-
-            if not user_id:
+            entry = await session_registry.find_socket(sid)
+            if not entry:
                 logger.warning(f"No user found for socket: {sid}")
                 return
+            user_id, session_id = entry
 
             # Update last active time
-            active_sessions[user_id][session_id]['last_active'] = datetime.now()
+            await session_registry.touch(user_id, session_id)
 
-            # Get and send status
-            status = await get_user_status(user_id)
-            status_update = await format_status(status, user_id)
-            await notify_sessions(user_id, 'status_update', status_update)
+            # Send status, shared with the user's other tabs asking at the same time
+            await status_publisher.request(user_id)
             
         except Exception as e:
-            logger.error(f"Status update error: {str(e)}", exc_info=True)
\ No newline at end of file
+            logger.error(f"Status update error: {str(e)}", exc_info=True)
+
+    @sio.on("subscribe_build_logs")
+    async def handle_subscribe_build_logs(sid):
+        try:
+            await join_room(sid, BUILD_LOG_ROOM)
+            # Replay the buffered output so late subscribers see the whole build
+            await sio.emit('build_log_backlog', {'lines': build_manager.get_build_log()}, to=sid)
+        except Exception as e:
+            logger.error(f"Build log subscribe error: {str(e)}", exc_info=True)
+
+    @sio.on("unsubscribe_build_logs")
+    async def handle_unsubscribe_build_logs(sid):
+        try:
+            await leave_room(sid, BUILD_LOG_ROOM)
+        except Exception as e:
+            logger.error(f"Build log unsubscribe error: {str(e)}", exc_info=True)
+
+    @sio.on("subscribe_build_status")
+    async def handle_subscribe_build_status(sid):
+        try:
+            await join_room(sid, BUILD_STATUS_ROOM)
+            build_manager.add_status_subscriber(sid)
+            await sio.emit('build_status', build_manager.get_build_status(), to=sid)
+        except Exception as e:
+            logger.error(f"Build status subscribe error: {str(e)}", exc_info=True)
+
+    @sio.on("unsubscribe_build_status")
+    async def handle_unsubscribe_build_status(sid):
+        try:
+            build_manager.remove_status_subscriber(sid)
+            await leave_room(sid, BUILD_STATUS_ROOM)
+        except Exception as e:
+            logger.error(f"Build status unsubscribe error: {str(e)}", exc_info=True)
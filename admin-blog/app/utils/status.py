@@ -1,11 +1,28 @@
 import asyncio
+import inspect
 import logging
-from . session_manager import active_sessions
+import os
+import time
+from collections import OrderedDict
+from . session_manager import session_registry
 
 logger = logging.getLogger(__name__)
 
 my_sio = None
 
+# Seconds a computed user status is reused for further requests
+STATUS_CACHE_TTL = float(os.getenv('STATUS_CACHE_SECONDS', '1'))
+
+# Minimum seconds between two status pushes to the same socket
+STATUS_EMIT_INTERVAL = float(os.getenv('STATUS_EMIT_INTERVAL_SECONDS', '0.5'))
+
+# Room every connected socket joins, for site-wide events such as builds
+SITE_ROOM = 'site'
+
+def user_room(user_id):
+    """Room holding every socket of one user"""
+    return f'user:{user_id}'
+
 async def get_user_status(user_id: str, wrapper=None) -> dict:
     status = {
         
@@ -24,34 +41,198 @@ async def notify_sessions(user_id, event, data):
         return 0
     user_id = str(user_id)
 
-    if user_id not in active_sessions:
-        logger.warning(f"[notify_sessions] No active sessions for user {user_id}")
+    sockets = await session_registry.user_sockets(user_id)
+    if not sockets:
+        logger.warning(f"[notify_sessions] No connected sessions for user {user_id}")
         return 0
 
-    successful = 0
-    total_sessions = len(active_sessions[user_id])
-    logger.debug(f"[notify_sessions] Found {total_sessions} active session(s) for user {user_id}")
+    # One emit to the user's room reaches every tab
+    try:
+        await my_sio.emit(event, data, room=user_room(user_id))
+        logger.debug(f"[notify_sessions] Emitted event '{event}' to {len(sockets)} session(s) of user {user_id}")
+        return len(sockets)
+    except Exception as e:
+        logger.error(f"[notify_sessions] Error emitting '{event}' to user {user_id}: {e}")
+        return 0
 
-    # Modified session iteration
-    for session_id, session_data in active_sessions[user_id].items():
-        # Ensure session_data is a dictionary
-        if isinstance(session_data, str):
-            logger.warning(f"Session data is string, converting to dict: {session_data}")
-            session_data = {'socket_id': session_data}
-        
-        socket_id = session_data.get('socket_id')
-        if not socket_id:
-            logger.debug(f"[notify_sessions] Session {session_id} has no socket_id, skipping")
-            continue
 
+class StatusPublisher:
+    """Answer status update requests without recomputing or re-sending per tab.
+
+    A computed status is cached per user for ``cache_ttl`` seconds, and
+    requests arriving while it is being computed wait for that computation
+    instead of starting their own. Each socket gets at most one push per
+    ``min_interval``: a repeat of what it was just sent is suppressed, and a
+    changed status is held back, so the socket still ends up with the latest
+    one. The changes held back for a user are sent together, as one emit to
+    the user's room once the interval of its sockets has passed.
+    """
+
+    def __init__(self, cache_ttl=STATUS_CACHE_TTL, min_interval=STATUS_EMIT_INTERVAL, clock=time.monotonic):
+        self.cache_ttl = cache_ttl
+        self.min_interval = min_interval
+        self._clock = clock
+        self._cache = OrderedDict()  # user_id -> (expiry, status), in expiry order
+        self._inflight = {}          # user_id -> computation task
+        self._last_emit = {}         # sid -> (time, status)
+        self._deferred = {}          # user_id -> status held back by the throttle
+        self._timers = {}            # user_id -> task sending the deferred status
+        self.requests = 0
+        self.computations = 0
+        self.cache_hits = 0
+        self.merged = 0
+        self.emits = 0
+        self.suppressed = 0
+        self.deferred = 0
+
+    async def request(self, user_id):
+        """Push the current status to the sockets of a user that may receive it"""
+        user_id = str(user_id)
+        self.requests += 1
+        status_update = await self._status(user_id)
+        sockets = list((await session_registry.user_sockets(user_id)).values())
+
+        now = self._clock()
+        due = []
+        held_until = []
+        for sid in sockets:
+            last = self._last_emit.get(sid)
+            if last is None or now - last[0] >= self.min_interval:
+                due.append(sid)
+            elif last[1] == status_update:
+                self.suppressed += 1
+            else:
+                held_until.append(last[0] + self.min_interval)
+        if held_until:
+            self._defer(user_id, status_update, max(held_until) - now)
+        if not due:
+            return 0
+
+        # One room emit when every tab is due, as after a quiet period
+        targets = [user_room(user_id)] if len(due) == len(sockets) else due
+        # Recorded before sending, so requests arriving meanwhile are throttled
+        self._sent(due, status_update, now, len(targets))
+        for room in targets:
+            await broadcast('status_update', status_update, room)
+        return len(due)
+
+    def forget(self, sid):
+        """Drop the throttle state of a disconnected socket"""
+        self._last_emit.pop(sid, None)
+
+    def invalidate(self, user_id):
+        """Discard the cached status of a user after it changed"""
+        self._cache.pop(str(user_id), None)
+
+    def metrics(self):
+        """Counters for computed, merged and suppressed status updates"""
+        return {
+            'requests': self.requests,
+            'computations': self.computations,
+            'cache_hits': self.cache_hits,
+            'merged': self.merged,
+            'emits': self.emits,
+            'suppressed': self.suppressed,
+            'deferred': self.deferred,
+            'cached_users': len(self._cache),
+            'throttled_sockets': len(self._last_emit),
+            'deferred_users': len(self._deferred),
+            'cache_ttl_seconds': self.cache_ttl,
+            'min_interval_seconds': self.min_interval
+        }
+
+    async def _status(self, user_id):
+        cached = self._cache.get(user_id)
+        if cached and cached[0] > self._clock():
+            self.cache_hits += 1
+            return cached[1]
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = self._inflight[user_id] = asyncio.ensure_future(self._compute(user_id))
+        else:
+            self.merged += 1
+        # A cancelled requester must not cancel the computation others wait on
+        return await asyncio.shield(task)
+
+    async def _compute(self, user_id):
+        try:
+            status = await get_user_status(user_id)
+            status_update = await format_status(status, user_id)
+            self.computations += 1
+            now = self._clock()
+            self._cache[user_id] = (now + self.cache_ttl, status_update)
+            self._cache.move_to_end(user_id)
+            # Every entry lives equally long, so expired ones are at the front
+            while self._cache:
+                expiry, _ = next(iter(self._cache.values()))
+                if expiry > now:
+                    break
+                self._cache.popitem(last=False)
+            return status_update
+        finally:
+            self._inflight.pop(user_id, None)
+
+    def _defer(self, user_id, status_update, delay):
+        if user_id in self._deferred:
+            self.merged += 1
+        else:
+            self.deferred += 1
+        self._deferred[user_id] = status_update
+        if user_id not in self._timers:
+            self._timers[user_id] = asyncio.ensure_future(self._send_deferred(user_id, delay))
+
+    async def _send_deferred(self, user_id, delay):
         try:
-            await my_sio.emit(event, data, room=socket_id)
-            successful += 1
-            logger.debug(f"[notify_sessions] Emitted event '{event}' to session {session_id} (socket_id={socket_id})")
-        except Exception as e:
-            logger.error(f"[notify_sessions] Error emitting to session {session_id} (socket_id={socket_id}): {e}")
+            await asyncio.sleep(delay)
+        finally:
+            # Changes held back from here on start the next window
+            self._timers.pop(user_id, None)
+        status_update = self._deferred.pop(user_id, None)
+        if status_update is None:
+            return
+        sockets = list((await session_registry.user_sockets(user_id)).values())
+        if sockets:
+            self._sent(sockets, status_update, self._clock(), 1)
+            await broadcast('status_update', status_update, user_room(user_id))
+
+    def _sent(self, sids, status_update, now, emits):
+        for sid in sids:
+            self._last_emit[sid] = (now, status_update)
+        self.emits += emits
+
+
+status_publisher = StatusPublisher()
+
+
+async def broadcast(event, data, room):
+    """Emit an event to every socket in a room (e.g. build log subscribers)"""
+    if my_sio is None:
+        logger.debug(f"[broadcast] Socket.IO instance not set, dropping '{event}'")
+        return False
+    try:
+        await my_sio.emit(event, data, room=room)
+        return True
+    except Exception as e:
+        logger.error(f"[broadcast] Error emitting '{event}' to room {room}: {e}")
+        return False
+
+
+async def broadcast_site(event, data):
+    """Emit a site-wide event to every connected socket"""
+    return await broadcast(event, data, room=SITE_ROOM)
+
+
+async def join_room(sid, room):
+    """Add a socket to a room; ``enter_room`` is a coroutine on newer python-socketio"""
+    result = my_sio.enter_room(sid, room)
+    if inspect.isawaitable(result):
+        await result
+
 
-    return successful
+async def leave_room(sid, room):
+    result = my_sio.leave_room(sid, room)
+    if inspect.isawaitable(result):
+        await result
 
 
 def set_sio_instance(sio_instance):
@@ -0,0 +1,52 @@
+"""Let benchmark scripts import app modules without the Quart application.
+
+Benchmarks run as plain scripts from the admin-blog directory, e.g.
+``python benchmarks/bench_socket_sessions.py``. Importing this module maps
+the ``app`` package without running app/__init__.py and stands in for
+quart and itsdangerous when they are not installed.
+"""
+import math
+import sys
+import types
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+
+if 'app' not in sys.modules:
+    package = types.ModuleType('app')
+    package.__path__ = [str(APP_DIR)]
+    sys.modules['app'] = package
+
+try:
+    import quart  # noqa: F401
+except ImportError:
+    quart = types.ModuleType('quart')
+    quart.session = {}
+    quart.current_app = None
+    sys.modules['quart'] = quart
+
+try:
+    import itsdangerous  # noqa: F401
+except ImportError:
+    itsdangerous = types.ModuleType('itsdangerous')
+    itsdangerous.URLSafeTimedSerializer = object
+    sys.modules['itsdangerous'] = itsdangerous
+
+
+def percentile(values, pct):
+    """``pct`` percentile of a list of numbers, nearest rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(title, rows, columns):
+    """Print a small aligned table of benchmark results"""
+    print(f"\n{title}")
+    widths = [max(len(str(c)), *(len(str(r[i])) for r in rows)) for i, c in enumerate(columns)]
+    for row in [columns, *rows]:
+        cells = [str(v).rjust(w) for v, w in zip(row, widths)]
+        cells[0] = str(row[0]).ljust(widths[0])
+        print('  '.join(cells))
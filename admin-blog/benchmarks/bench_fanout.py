@@ -0,0 +1,95 @@
+"""Fan a user event out to 1, 10 and 100 tabs.
+
+Compares notify_sessions, which emits once to the user's room, with the
+loop it replaced, which emitted to every socket of the user in turn.
+python-socketio is stood in for by a server that, like AsyncServer,
+encodes the packet once per emit, queues it on every socket of the
+target room and yields to the loop while sending.
+
+    python benchmarks/bench_fanout.py [--tabs 1 10 100] [--events 2000]
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+import _support
+from app.utils import status
+from app.utils.session_manager import SessionRegistry
+
+
+class FanoutServer:
+    """Room bookkeeping and per-emit encoding of a Socket.IO server"""
+
+    def __init__(self):
+        self.rooms = defaultdict(set)
+        self.queues = defaultdict(list)
+        self.emits = 0
+        self.packets = 0
+
+    def enter_room(self, sid, room):
+        self.rooms[room].add(sid)
+
+    def leave_room(self, sid, room):
+        self.rooms[room].discard(sid)
+
+    async def emit(self, event, data, room=None):
+        self.emits += 1
+        packet = json.dumps([event, data])
+        for sid in self.rooms.get(room, ()):
+            self.queues[sid].append(packet)
+            self.packets += 1
+        await asyncio.sleep(0)
+
+
+async def notify_each_socket(user_id, event, data):
+    """Fan-out before per-user rooms: one emit per socket of the user"""
+    sockets = await status.session_registry.user_sockets(user_id)
+    for socket_id in sockets.values():
+        await status.my_sio.emit(event, data, room=socket_id)
+    return len(sockets)
+
+
+async def run(tab_counts, events):
+    payload = {'type': 'status', 'balance': 1234.5, 'positions': list(range(20))}
+    rows = []
+    for tabs in tab_counts:
+        for name, notify in (('per socket', notify_each_socket), ('user room', status.notify_sessions)):
+            server = FanoutServer()
+            registry = SessionRegistry()
+            status.my_sio = server
+            status.session_registry = registry
+            for i in range(tabs):
+                sid = f'sid-{i}'
+                await registry.attach_socket('1', f'session-{i}', sid)
+                # Every Socket.IO client is in a room named after its sid
+                server.enter_room(sid, sid)
+                await status.join_room(sid, status.user_room('1'))
+
+            started = time.perf_counter()
+            for _ in range(events):
+                assert await notify('1', 'status_update', payload) == tabs
+            seconds = time.perf_counter() - started
+
+            assert server.packets == tabs * events
+            rows.append((
+                f'{tabs} tab(s), {name}', events, server.emits,
+                f'{seconds:.3f}', f'{seconds / events * 1e6:.1f}'
+            ))
+    _support.report(
+        f'{events} events per run',
+        rows, ('fan-out', 'events', 'emits', 'seconds', 'us/event')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tabs', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--events', type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.tabs, args.events))
+
+
+if __name__ == '__main__':
+    main()
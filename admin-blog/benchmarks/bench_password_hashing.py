@@ -0,0 +1,98 @@
+"""Login throughput and event loop lag with bcrypt on and off the loop.
+
+A burst of concurrent logins each verifies one password, while a ticker
+measures how late the event loop wakes it up. Verification runs either
+directly on the loop, as login used to, or through verify_password_async
+on the bounded hashing pool. A burst larger than the pool's workers plus
+queue shows how many requests would get a 429.
+
+    python benchmarks/bench_password_hashing.py [--logins 64] [--rounds 12]
+        [--workers 2] [--queue 32]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import _support
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=64, help='concurrent logins per burst')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt work factor')
+    parser.add_argument('--workers', type=int, default=2, help='hashing threads')
+    parser.add_argument('--queue', type=int, default=32, help='hashes allowed to wait')
+    return parser.parse_args()
+
+
+async def measure(start_burst, tick=0.005):
+    """Run the burst of logins ``start_burst()`` starts; returns its results,
+    wall time and the loop lag samples"""
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = loop.time()
+            await asyncio.sleep(tick)
+            lags.append(loop.time() - started - tick)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(tick * 2)
+    started = time.perf_counter()
+    results = await start_burst()
+    seconds = time.perf_counter() - started
+    done.set()
+    await task
+    return results, seconds, lags
+
+
+async def run(args, common):
+    hashed = common.hash_password('correct horse battery staple')
+
+    async def login_on_loop():
+        await asyncio.sleep(0)
+        return common.verify_password('correct horse battery staple', hashed)
+
+    async def login_on_pool():
+        try:
+            return await common.verify_password_async('correct horse battery staple', hashed)
+        except common.PasswordHasherBusy:
+            return None
+
+    rows = []
+    for name, login in (('on the loop', login_on_loop), ('hashing pool', login_on_pool)):
+        results, seconds, lags = await measure(
+            lambda: asyncio.gather(*(login() for _ in range(args.logins)))
+        )
+        served = sum(1 for r in results if r)
+        rows.append((
+            name, served, args.logins - served, f'{seconds:.2f}',
+            f'{served / seconds:.1f}',
+            f'{_support.percentile(lags, 50) * 1000:.1f}',
+            f'{_support.percentile(lags, 99) * 1000:.1f}',
+            f'{max(lags) * 1000:.1f}'
+        ))
+    _support.report(
+        f'{args.logins} concurrent logins, bcrypt rounds {args.rounds}, '
+        f'{args.workers} worker(s), queue {args.queue}',
+        rows,
+        ('verification', 'served', '429', 'seconds', 'logins/s', 'lag p50 ms', 'lag p99 ms', 'lag max ms')
+    )
+
+
+def main():
+    args = parse_args()
+    # Read by app.utils.common at import time
+    os.environ['BCRYPT_ROUNDS'] = str(args.rounds)
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+    os.environ['PASSWORD_HASH_QUEUE'] = str(args.queue)
+    from app.utils import common
+
+    asyncio.run(run(args, common))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Connect, look up and disconnect 10k sockets in the session registry.
+
+Times what the Socket.IO handlers do per socket: attach_socket on connect,
+find_socket on every event and detach_socket on disconnect. The sid
+lookup is compared with the scan over every session that the sid index
+replaced.
+
+    python benchmarks/bench_socket_sessions.py [--sockets 10000] [--tabs 2]
+"""
+import argparse
+import asyncio
+import time
+
+import _support
+from app.utils.session_manager import SessionRegistry
+
+
+def scan_for_socket(registry, sid):
+    """Socket lookup without the sid index: walk every session of every user"""
+    for user_id, sessions in registry._sessions.items():
+        for session_id, data in sessions.items():
+            if data.get('socket_id') == sid:
+                return user_id, session_id
+    return None
+
+
+async def run(count, tabs, scan_sample):
+    registry = SessionRegistry()
+    sids = [f'sid-{i}' for i in range(count)]
+    rows = []
+
+    def row(name, ops, seconds):
+        rows.append((name, ops, f'{seconds:.3f}', f'{seconds / ops * 1e6:.1f}'))
+
+    started = time.perf_counter()
+    for i, sid in enumerate(sids):
+        await registry.attach_socket(i // tabs, f'session-{i}', sid)
+    row('connect (attach_socket)', count, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for sid in sids:
+        assert await registry.find_socket(sid)
+    row('lookup (find_socket)', count, time.perf_counter() - started)
+
+    sample = sids[::max(1, count // scan_sample)]
+    started = time.perf_counter()
+    for sid in sample:
+        assert scan_for_socket(registry, sid)
+    row('lookup (full scan)', len(sample), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for sid in sids:
+        assert await registry.detach_socket(sid)
+    row('disconnect (detach_socket)', count, time.perf_counter() - started)
+
+    metrics = await registry.metrics()
+    assert metrics['sockets'] == metrics['sessions'] == 0
+    _support.report(
+        f'{count} sockets, {tabs} per user',
+        rows, ('operation', 'ops', 'seconds', 'us/op')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sockets', type=int, default=10000)
+    parser.add_argument('--tabs', type=int, default=2, help='sockets per user')
+    parser.add_argument('--scan-sample', type=int, default=1000,
+                        help='lookups timed with the full scan, which is slow')
+    args = parser.parse_args()
+    asyncio.run(run(args.sockets, args.tabs, args.scan_sample))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import sys
+import types
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1] / 'app'
+
+# Import app modules without running app/__init__.py, which builds and
+# configures the whole Quart application
+if 'app' not in sys.modules:
+    package = types.ModuleType('app')
+    package.__path__ = [str(APP_DIR)]
+    sys.modules['app'] = package
+
+# The modules under test only touch these at request time
+try:
+    import quart  # noqa: F401
+except ImportError:
+    quart = types.ModuleType('quart')
+    quart.session = {}
+    quart.current_app = None
+    sys.modules['quart'] = quart
+
+try:
+    import itsdangerous  # noqa: F401
+except ImportError:
+    itsdangerous = types.ModuleType('itsdangerous')
+    itsdangerous.URLSafeTimedSerializer = object
+    sys.modules['itsdangerous'] = itsdangerous
@@ -0,0 +1,42 @@
+from app.services.build_cache import BuildCache
+
+
+def fill(path, size):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / 'chunk').write_bytes(b'x' * size)
+
+
+def test_stats_walk_the_cache_once(tmp_path, monkeypatch):
+    site = tmp_path / 'site'
+    site.mkdir()
+    fill(tmp_path / 'cache' / 'old', 100)
+    cache = BuildCache(tmp_path / 'cache', max_bytes=10_000)
+
+    assert cache.stats() == {'entries': 1, 'size_bytes': 100, 'max_bytes': 10_000}
+
+    walks = []
+    size = BuildCache._size
+    monkeypatch.setattr(BuildCache, '_size', staticmethod(lambda path: walks.append(path) or size(path)))
+    assert cache.stats()['size_bytes'] == 100
+    assert walks == []
+
+    # A build updates the totals as it acquires and releases its directory
+    lease = cache.acquire(site)
+    fill(lease.path, 250)
+    cache.release(lease)
+    assert cache.stats() == {'entries': 2, 'size_bytes': 350, 'max_bytes': 10_000}
+
+
+def test_stats_follow_pruning(tmp_path):
+    site = tmp_path / 'site'
+    site.mkdir()
+    fill(tmp_path / 'cache' / 'old', 600)
+    cache = BuildCache(tmp_path / 'cache', max_bytes=1000)
+    assert cache.stats()['size_bytes'] == 600
+
+    lease = cache.acquire(site)
+    fill(lease.path, 500)
+    cache.release(lease)
+
+    assert not (tmp_path / 'cache' / 'old').exists()
+    assert cache.stats() == {'entries': 1, 'size_bytes': 500, 'max_bytes': 1000}
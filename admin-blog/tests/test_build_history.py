@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.services import build_history
+
+
+def build_info(number, trigger_source):
+    start = datetime(2024, 1, 1) + timedelta(minutes=number)
+    return {
+        'id': f'build-{number}',
+        'status': 'success',
+        'start_time': start.isoformat(),
+        'end_time': (start + timedelta(seconds=30)).isoformat(),
+        'trigger_source': trigger_source,
+    }
+
+
+def test_trigger_filter_matches_wildcards_literally(monkeypatch):
+    async def scenario():
+        engine = create_async_engine('sqlite+aiosqlite://')
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        monkeypatch.setattr(build_history, 'async_session',
+                            sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+
+        for number, trigger in enumerate(['publish:a', 'publish:_draft', 'manual', '100% rebuild']):
+            await build_history.save_build(build_info(number, trigger))
+
+        async def triggers(pattern):
+            page = await build_history.list_builds(trigger=pattern)
+            return sorted(build['trigger_source'] for build in page['history'])
+
+        assert await triggers('publish:_') == ['publish:_draft']
+        assert await triggers('%') == ['100% rebuild']
+        assert await triggers('publish') == ['publish:_draft', 'publish:a']
+        await engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import shutil
+import signal
+
+import pytest
+
+from app.services import build_history, build_manager, build_site
+from app.services.build_cache import BuildCache
+from app.services.build_manager import BuildManager, BuildStatus
+from app.services.build_site import BuildTarget, build_docusaurus_site
+
+
+class FakePipeline:
+    """Stands in for build_docusaurus_site; each build waits for ``release``"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.cancelled = 0
+
+    async def __call__(self, target, on_output=None, cache_dir=None, out_dir=None):
+        self.calls.append(target.name)
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        out_dir.mkdir(parents=True)
+        return {'status': 'success', 'message': 'Built', 'log_file': None}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    async def no_timings(target, limit):
+        return []
+
+    async def discard(build_info):
+        pass
+
+    site = tmp_path / 'site'
+    (site / 'blog').mkdir(parents=True)
+    (site / 'blog' / 'post.md').write_text('---\ntitle: Post\n---\n', encoding='utf-8')
+    monkeypatch.setattr(build_manager, 'LOGS_DIR', tmp_path / 'logs')
+    monkeypatch.setenv('BUILD_RELEASES_DIR', str(tmp_path / 'releases'))
+    monkeypatch.setattr(build_history, 'recent_timings', no_timings)
+    monkeypatch.setattr(build_history, 'save_build', discard)
+
+    pipeline = FakePipeline()
+    monkeypatch.setattr(build_manager, 'build_docusaurus_site', pipeline)
+    manager = BuildManager(debounce_seconds=0.05, targets=[BuildTarget('site', site)])
+    manager.cache = BuildCache(tmp_path / 'cache')
+    manager.pipeline = pipeline
+    return manager
+
+
+async def wait_for(predicate, timeout=5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, 'timed out'
+        await asyncio.sleep(0.01)
+
+
+def idle(manager, builds):
+    return manager.current_build is None and len(manager.build_history) == builds
+
+
+def test_triggers_within_the_debounce_window_share_one_build(manager):
+    async def scenario():
+        manager.pipeline.release.set()
+        for trigger in ('publish:a', 'edit:b', 'publish:c'):
+            manager.start_build(trigger)
+            await asyncio.sleep(0.01)
+        await wait_for(lambda: idle(manager, 1))
+        # The window restarts with every trigger, so nothing ran early
+        await asyncio.sleep(0.1)
+
+        assert manager.pipeline.calls == ['site']
+        build = manager.build_history[0]
+        assert build['trigger_sources'] == ['publish:a', 'edit:b', 'publish:c']
+        assert build['status'] == BuildStatus.SUCCESS.value
+        assert not manager._background
+
+    asyncio.run(scenario())
+
+
+def test_triggers_during_a_build_coalesce_into_one_follow_up(manager):
+    async def scenario():
+        manager.start_build('manual')
+        await manager.pipeline.started.wait()
+
+        for trigger in ('publish:a', 'publish:b', 'edit:c'):
+            response = manager.start_build(trigger, force=True)
+        assert response['status'] == 'queued'
+        assert response['pending_triggers'] == ['publish:a', 'publish:b', 'edit:c']
+
+        manager.pipeline.release.set()
+        await wait_for(lambda: idle(manager, 2))
+        await asyncio.sleep(0.1)
+
+        assert manager.pipeline.calls == ['site', 'site']
+        assert [b['trigger_sources'] for b in reversed(manager.build_history)] == [
+            ['manual'], ['publish:a', 'publish:b', 'edit:c']
+        ]
+        assert manager.build_history[0]['force']
+
+    asyncio.run(scenario())
+
+
+def test_preempting_publish_cancels_the_running_build(manager):
+    async def scenario():
+        manager.start_build('edit:a')
+        await manager.pipeline.started.wait()
+
+        response = manager.start_build('publish:b', preempt=True)
+        assert response['pending_triggers'] == ['edit:a', 'publish:b']
+        manager.pipeline.release.set()
+        await wait_for(lambda: idle(manager, 2))
+
+        cancelled, rebuilt = reversed(manager.build_history)
+        assert manager.pipeline.cancelled == 1
+        assert cancelled['status'] == BuildStatus.CANCELLED.value
+        assert cancelled['message'] == 'Build cancelled: Superseded by publish:b'
+        assert rebuilt['status'] == BuildStatus.SUCCESS.value
+        assert rebuilt['trigger_sources'] == ['edit:a', 'publish:b']
+        # Only the build that finished became a release
+        assert manager.get_releases()['site']['current'] == rebuilt['targets']['site']['release']
+
+    asyncio.run(scenario())
+
+
+def test_cancel_build_stops_the_pipeline(manager):
+    async def scenario():
+        assert manager.cancel_build()['status'] == 'idle'
+        manager.start_build('manual')
+        await manager.pipeline.started.wait()
+
+        assert manager.cancel_build()['status'] == 'cancelling'
+        await wait_for(lambda: idle(manager, 1))
+
+        build = manager.build_history[0]
+        assert manager.pipeline.cancelled == 1
+        assert build['status'] == BuildStatus.CANCELLED.value
+        assert build['targets']['site']['status'] == BuildStatus.CANCELLED.value
+        assert build['message'] == 'Build cancelled: Cancelled by user'
+        assert manager.get_releases()['site']['current'] is None
+
+    asyncio.run(scenario())
+
+
+def process_gone(pid):
+    """True once ``pid`` has exited; an unreaped zombie counts as gone"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] == 'Z'
+    except FileNotFoundError:
+        return True
+
+
+@pytest.mark.skipif(not (shutil.which('npm') and os.path.isdir('/proc')),
+                    reason='needs npm and /proc')
+def test_cancelled_build_leaves_no_child_process(tmp_path, monkeypatch):
+    site = tmp_path / 'site'
+    (site / 'blog').mkdir(parents=True)
+    (site / 'blog' / 'post.md').write_text('---\ntitle: Post\n---\n', encoding='utf-8')
+    (site / 'package.json').write_text(json.dumps({'scripts': {'build': 'node build.js'}}))
+    # A build that starts a worker of its own and never finishes
+    (site / 'build.js').write_text("""
+const {spawn} = require('child_process');
+const worker = spawn('sleep', ['60'], {stdio: 'ignore'});
+require('fs').writeFileSync('pids', [process.pid, worker.pid].join(' '));
+setInterval(() => {}, 1000);
+""")
+    monkeypatch.setattr(build_site, 'LOGS_DIR', tmp_path / 'logs')
+
+    async def scenario():
+        build = asyncio.ensure_future(build_docusaurus_site(BuildTarget('site', site)))
+        await wait_for(lambda: (site / 'pids').exists() and (site / 'pids').read_text())
+        pids = [int(pid) for pid in (site / 'pids').read_text().split()]
+
+        try:
+            build.cancel()
+            # A surviving child keeps the output pipes open, so the build never returns
+            done, _ = await asyncio.wait([build], timeout=10)
+            assert done and build.cancelled()
+            await wait_for(lambda: all(process_gone(pid) for pid in pids), timeout=3)
+        finally:
+            for pid in pids:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    asyncio.run(scenario())
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import shutil
+
+import pytest
+
+from app.services import build_site
+from app.services.build_site import BuildTarget, build_docusaurus_site
+
+pytestmark = pytest.mark.skipif(
+    not (shutil.which('npm') and shutil.which('node')), reason='needs npm and node'
+)
+
+# Stands in for `docusaurus build --out-dir <dir>`
+FAKE_BUILD = """
+const fs = require('fs');
+const out = process.argv[process.argv.indexOf('--out-dir') + 1];
+fs.mkdirSync(out, {recursive: true});
+fs.writeFileSync(out + '/sitemap.xml', '<urlset/>');
+"""
+
+
+def make_site(tmp_path, sitemap_script):
+    site = tmp_path / 'site'
+    (site / 'blog').mkdir(parents=True)
+    (site / 'blog' / 'post.md').write_text('---\ntitle: Post\n---\n', encoding='utf-8')
+    (site / 'package.json').write_text(json.dumps({'scripts': {'build': 'node build.js'}}))
+    (site / 'build.js').write_text(FAKE_BUILD)
+    (site / build_site.SITEMAP_SCRIPT).write_text(sitemap_script)
+    return BuildTarget('test', site)
+
+
+def build(tmp_path, monkeypatch, sitemap_script):
+    monkeypatch.setattr(build_site, 'LOGS_DIR', tmp_path / 'logs')
+    target = make_site(tmp_path, sitemap_script)
+    return asyncio.run(build_docusaurus_site(target, out_dir=tmp_path / 'out'))
+
+
+def test_sitemaps_run_on_the_output(tmp_path, monkeypatch):
+    result = build(tmp_path, monkeypatch, """
+const fs = require('fs');
+fs.writeFileSync(process.argv[2] + '/sitemap-docs.xml', '<urlset/>');
+""")
+
+    assert result['status'] == 'success'
+    assert 'sitemap_error' not in result
+    assert (tmp_path / 'out' / 'sitemap-docs.xml').exists()
+
+
+def test_failing_sitemaps_do_not_fail_the_build(tmp_path, monkeypatch):
+    result = build(tmp_path, monkeypatch, 'process.exit(3);')
+
+    assert result['status'] == 'success'
+    assert result['sitemap_error'] == f'{build_site.SITEMAP_SCRIPT} exited with code 3'
+    assert (tmp_path / 'out' / 'sitemap.xml').exists()
@@ -0,0 +1,74 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.catalog_watcher import CatalogWatcher, _CatalogEventHandler
+from app.services.post_index import PostIndex
+
+
+def write_post(path, title):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f'---\ntitle: {title}\n---\n\nbody', encoding='utf-8')
+
+
+def make_watcher(tmp_path, posts=3):
+    for i in range(posts):
+        write_post(tmp_path / 'blog' / f'post-{i}.md', f'Post {i}')
+    return CatalogWatcher(PostIndex(tmp_path / 'blog', tmp_path / 'drafts'))
+
+
+def event(event_type, path, dest_path=None):
+    return SimpleNamespace(event_type=event_type, src_path=str(path),
+                           dest_path=dest_path and str(dest_path), is_directory=False)
+
+
+def test_read_events_do_not_touch_the_index(tmp_path):
+    watcher = make_watcher(tmp_path)
+    watcher.index.refresh()
+    handler = _CatalogEventHandler(watcher)
+    post = tmp_path / 'blog' / 'post-0.md'
+
+    handler.on_any_event(event('opened', post))
+    handler.on_any_event(event('closed_no_write', post))
+    assert watcher.event_count == 0
+
+    write_post(post, 'Renamed')
+    handler.on_any_event(event('modified', post))
+    handler.on_any_event(event('closed', post))
+    assert watcher.event_count == 1
+    assert watcher.index.by_slug('post-0').title == 'Renamed'
+
+
+def test_moved_post_is_reindexed_under_its_new_name(tmp_path):
+    watcher = make_watcher(tmp_path)
+    watcher.index.refresh()
+    handler = _CatalogEventHandler(watcher)
+    old, new = tmp_path / 'blog' / 'post-0.md', tmp_path / 'blog' / 'moved.md'
+
+    old.rename(new)
+    handler.on_any_event(event('moved', old, new))
+
+    assert watcher.event_count == 1
+    assert watcher.index.by_slug('post-0') is None
+    assert watcher.index.by_slug('moved').title == 'Post 0'
+
+
+def test_reading_posts_is_not_counted_as_a_change(tmp_path):
+    pytest.importorskip('watchdog')
+    watcher = make_watcher(tmp_path, posts=20)
+    watcher.start()
+    try:
+        assert watcher.mode == 'inotify'
+        for path in sorted((tmp_path / 'blog').iterdir()):
+            path.read_text(encoding='utf-8')
+        time.sleep(0.5)
+        assert watcher.event_count == 0
+
+        write_post(tmp_path / 'blog' / 'post-0.md', 'Changed')
+        deadline = time.monotonic() + 5
+        while watcher.event_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert watcher.event_count > 0
+    finally:
+        watcher.stop()
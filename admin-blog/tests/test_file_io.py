@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from app.services import file_io, post_store
+
+
+def slow_write(path, content, delay):
+    """A post write on a disk that takes ``delay`` seconds to respond"""
+    time.sleep(delay)
+    post_store.atomic_write(path, content)
+
+
+async def measure_lag(work, interval=0.01):
+    """Run ``work`` while a ticker records how late each of its sleeps wakes up"""
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = loop.time()
+            await asyncio.sleep(interval)
+            lags.append(loop.time() - started - interval)
+
+    task = asyncio.create_task(ticker())
+    try:
+        await work
+    finally:
+        done.set()
+        await task
+    return lags
+
+
+def test_slow_write_keeps_loop_responsive(tmp_path):
+    path = tmp_path / '2024-01-01-post.md'
+
+    lags = asyncio.run(measure_lag(file_io.run_io(slow_write, path, 'body', 0.5)))
+
+    assert path.read_text(encoding='utf-8') == 'body'
+    # The loop kept ticking through the whole write
+    assert len(lags) >= 20
+    assert max(lags) < 0.1
+
+
+def test_blocking_write_on_loop_stalls_it(tmp_path):
+    # What run_io avoids: the same write made directly on the loop
+    async def on_loop():
+        await asyncio.sleep(0)
+        slow_write(tmp_path / 'post.md', 'body', 0.3)
+
+    lags = asyncio.run(measure_lag(on_loop()))
+
+    assert max(lags) >= 0.25
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('bcrypt')
+
+from app.utils import common
+
+
+@pytest.fixture
+def one_worker_pool(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(common, '_hash_executor', executor)
+    monkeypatch.setattr(common, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setattr(common, 'PASSWORD_HASH_QUEUE', 0)
+    yield
+    executor.shutdown(wait=True)
+
+
+def test_hash_round_trip(monkeypatch):
+    monkeypatch.setattr(common, 'BCRYPT_ROUNDS', 4)
+
+    async def scenario():
+        hashed = await common.hash_password_async('secret')
+        assert hashed.startswith('$2b$04$')
+        assert await common.verify_password_async('secret', hashed)
+        assert not await common.verify_password_async('wrong', hashed)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_request_keeps_its_slot_until_the_hash_finishes(one_worker_pool):
+    release = threading.Event()
+    started = threading.Event()
+
+    def busy_hash():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    async def scenario():
+        request = asyncio.ensure_future(common._run_hash(busy_hash))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        # The client goes away, but the pool is still hashing for it
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        with pytest.raises(common.PasswordHasherBusy):
+            await common._run_hash(busy_hash)
+
+        release.set()
+        for _ in range(100):
+            if common._hash_pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert await common._run_hash(lambda: 'next') == 'next'
+
+    asyncio.run(scenario())
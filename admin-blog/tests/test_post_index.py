@@ -0,0 +1,52 @@
+from app.services.post_index import PostIndex
+
+
+def write_post(directory, filename, title, slug=None, tags=None):
+    lines = ['---', f'title: {title}']
+    if slug:
+        lines.append(f'slug: {slug}')
+    if tags:
+        lines.append(f'tags: {tags}')
+    lines += ['---', '', 'body']
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / filename).write_text('\n'.join(lines), encoding='utf-8')
+
+
+def make_index(tmp_path):
+    return PostIndex(tmp_path / 'blog', tmp_path / 'drafts')
+
+
+def test_posts_sharing_a_slug_resolve_by_filename_stem(tmp_path):
+    write_post(tmp_path / 'blog', '2024-01-01-foo.md', 'Published', slug='foo')
+    write_post(tmp_path / 'drafts', '2024-02-01-foo.md', 'Draft', slug='foo')
+    index = make_index(tmp_path)
+    index.refresh()
+
+    assert index.by_slug('2024-01-01-foo').title == 'Published'
+    assert index.by_slug('2024-02-01-foo').title == 'Draft'
+    assert index.by_slug('2024-02-01-foo.md').title == 'Draft'
+    # The shared slug names neither post
+    assert index.by_slug('foo') is None
+    assert index.by_slug('foo', draft=True).title == 'Draft'
+
+
+def test_unique_slug_is_an_alias(tmp_path):
+    write_post(tmp_path / 'blog', '2024-01-01-foo.md', 'Foo', slug='foo')
+    index = make_index(tmp_path)
+    index.refresh()
+
+    post = index.by_slug('foo')
+    assert post.title == 'Foo'
+    assert post.stem == '2024-01-01-foo'
+
+
+def test_alias_goes_away_with_its_post(tmp_path):
+    write_post(tmp_path / 'blog', '2024-01-01-foo.md', 'Foo', slug='foo')
+    write_post(tmp_path / 'drafts', '2024-02-01-foo.md', 'Other', slug='foo')
+    index = make_index(tmp_path)
+    index.refresh()
+
+    (tmp_path / 'drafts' / '2024-02-01-foo.md').unlink()
+    index.refresh()
+
+    assert index.by_slug('foo').title == 'Foo'
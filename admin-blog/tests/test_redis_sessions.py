@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+
+from app.utils import status
+from app.utils.session_manager import RedisSessionRegistry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingServer:
+    """Socket.IO server of one worker; records what it was asked to emit"""
+
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data, room=None):
+        self.emitted.append((event, data, room))
+
+
+def make_workers(count=2, ttl=60):
+    """Session registries of ``count`` workers sharing one Redis"""
+    server = fakeredis.FakeServer()
+    clock = Clock()
+    registries = [
+        RedisSessionRegistry(
+            ttl=ttl, clock=clock,
+            client=fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+        )
+        for _ in range(count)
+    ]
+    return registries, clock
+
+
+def test_workers_deliver_to_each_others_clients(monkeypatch):
+    async def scenario():
+        (worker_a, worker_b), _ = make_workers()
+        # One tab is connected to each worker
+        await worker_a.attach_socket(7, 'session-a', 'sid-a')
+        await worker_b.attach_socket(7, 'session-b', 'sid-b')
+
+        assert await worker_b.find_socket('sid-a') == ('7', 'session-a')
+        assert await worker_a.user_sockets(7) == {'session-a': 'sid-a', 'session-b': 'sid-b'}
+
+        # Worker B notifies the user: it sees both tabs and emits once to the
+        # user room, which the Redis client manager delivers on every worker
+        sio = RecordingServer()
+        monkeypatch.setattr(status, 'session_registry', worker_b)
+        monkeypatch.setattr(status, 'my_sio', sio)
+        assert await status.notify_sessions(7, 'status_update', {'ok': True}) == 2
+        assert sio.emitted == [('status_update', {'ok': True}, status.user_room('7'))]
+
+        # A disconnect handled by worker A is seen by worker B
+        assert await worker_a.detach_socket('sid-a') == ('7', 'session-a')
+        assert await worker_b.user_sockets(7) == {'session-b': 'sid-b'}
+        assert await worker_b.find_socket('sid-a') is None
+
+    asyncio.run(scenario())
+
+
+def test_touch_does_not_clobber_a_concurrent_attach():
+    async def scenario():
+        (worker_a, worker_b), _ = make_workers()
+        for i in range(50):
+            session_id = f'session-{i}'
+            await worker_a.touch(1, session_id)
+            await asyncio.gather(
+                worker_a.touch(1, session_id),
+                worker_b.attach_socket(1, session_id, f'sid-{i}'),
+                worker_a.touch(1, session_id),
+            )
+            sessions = await worker_b.user_sessions(1)
+            assert sessions[session_id]['socket_id'] == f'sid-{i}'
+
+    asyncio.run(scenario())
+
+
+def test_expired_session_is_evicted_by_one_worker():
+    async def scenario():
+        (worker_a, worker_b), clock = make_workers(ttl=10)
+        await worker_a.attach_socket(1, 'session', 'sid')
+        clock.now += 11
+
+        evicted = await asyncio.gather(worker_a.evict_expired(), worker_b.evict_expired())
+
+        assert sorted(evicted) == [0, 1]
+        assert await worker_b.find_socket('sid') is None
+        metrics = await worker_a.metrics()
+        assert (metrics['users'], metrics['sessions'], metrics['sockets']) == (0, 0, 0)
+
+    asyncio.run(scenario())
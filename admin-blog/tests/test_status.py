@@ -0,0 +1,106 @@
+import asyncio
+
+from app.utils import status
+from app.utils.session_manager import SessionRegistry
+
+TABS = 10
+
+
+class RecordingServer:
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data, room=None):
+        self.emitted.append((event, data, room))
+        # Like AsyncServer, hand the loop to other requests while sending
+        await asyncio.sleep(0)
+
+
+def setup(monkeypatch, min_interval=0.05):
+    """Publisher for a user with TABS sockets whose status is computed slowly"""
+    computed = []
+    version = {'value': 1}
+
+    async def get_user_status(user_id, wrapper=None):
+        computed.append(user_id)
+        await asyncio.sleep(0.01)
+        return {'version': version['value']}
+
+    async def format_status(user_status, user_id):
+        return dict(user_status)
+
+    sio = RecordingServer()
+    monkeypatch.setattr(status, 'get_user_status', get_user_status)
+    monkeypatch.setattr(status, 'format_status', format_status)
+    monkeypatch.setattr(status, 'session_registry', SessionRegistry())
+    monkeypatch.setattr(status, 'my_sio', sio)
+    publisher = status.StatusPublisher(cache_ttl=60, min_interval=min_interval)
+    return publisher, sio, computed, version
+
+
+async def attach_tabs():
+    for i in range(TABS):
+        await status.session_registry.attach_socket('1', f'session-{i}', f'sid-{i}')
+
+
+async def request_from_every_tab(publisher):
+    await asyncio.gather(*(publisher.request('1') for _ in range(TABS)))
+
+
+def test_concurrent_requests_share_one_computation_and_one_emit(monkeypatch):
+    publisher, sio, computed, version = setup(monkeypatch)
+
+    async def scenario():
+        await attach_tabs()
+        await request_from_every_tab(publisher)
+        assert computed == ['1']
+        assert sio.emitted == [('status_update', {'version': 1}, status.user_room('1'))]
+
+        # The status changes within the throttle window of every tab
+        version['value'] = 2
+        publisher.invalidate('1')
+        await request_from_every_tab(publisher)
+        assert len(computed) == 2
+        assert len(sio.emitted) == 1
+
+        await asyncio.sleep(publisher.min_interval * 2)
+        assert sio.emitted[1:] == [('status_update', {'version': 2}, status.user_room('1'))]
+        assert publisher.metrics()['emits'] == 2
+        assert publisher.metrics()['deferred_users'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_change_after_the_window_is_sent_right_away(monkeypatch):
+    publisher, sio, computed, version = setup(monkeypatch)
+
+    async def scenario():
+        await attach_tabs()
+        await request_from_every_tab(publisher)
+        await asyncio.sleep(publisher.min_interval * 2)
+
+        version['value'] = 2
+        publisher.invalidate('1')
+        await request_from_every_tab(publisher)
+
+        assert len(computed) == 2
+        assert [room for _, _, room in sio.emitted] == [status.user_room('1')] * 2
+        assert sio.emitted[-1][1] == {'version': 2}
+
+    asyncio.run(scenario())
+
+
+def test_unchanged_status_is_not_sent_again(monkeypatch):
+    publisher, sio, computed, _ = setup(monkeypatch)
+
+    async def scenario():
+        await attach_tabs()
+        await request_from_every_tab(publisher)
+        await request_from_every_tab(publisher)
+        await asyncio.sleep(publisher.min_interval * 2)
+
+        assert computed == ['1']
+        assert len(sio.emitted) == 1
+        assert publisher.metrics()['suppressed'] == TABS * (2 * TABS - 1)
+
+    asyncio.run(scenario())
@@ -2,7 +2,8 @@
 import fs from "fs";
 import path from "path";
 
-const buildDir = path.resolve("./build");
+// Output directory of the build; the admin app passes its release directory
+const buildDir = path.resolve(process.argv[2] || "./build");
 const baseSitemapPath = path.join(buildDir, "sitemap.xml");
 
 // Ensure sitemap.xml exists